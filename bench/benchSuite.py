@@ -0,0 +1,203 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Benchmark suite of the build and replace phases. Synthetic documents
+# (see docGenerator.py) are generated for a set of cases, every case changes
+# one parameter of a base case (paragraphs, labels per kind, references per
+# label or runs per label). The load, build and replace phases are timed
+# separately, the best of the repetitions is kept. The results are written to
+# a JSON file and compared against a baseline (a results file of an earlier
+# run), the phases that are slower than the threshold are flagged.
+#
+# Run from the repository root:
+#   $ python bench/benchSuite.py -o bench/baseline.json
+#   ... change the code ...
+#   $ python bench/benchSuite.py -o results.json --baseline bench/baseline.json
+
+import sys
+import os
+import io
+import json
+import time
+import argparse
+import platform
+import tempfile
+import contextlib
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from docx import Document
+from docGenerator import generateDocument
+import WordTea
+
+phases = ['load', 'build', 'replace']
+
+# Base case and the values of every parameter, (paragraphs, labels, refs, fragments)
+suites = {
+    'quick': {'base': (500, 10, 2, 1),
+              'paragraphs': [100, 2000],
+              'labels': [50],
+              'refs': [8],
+              'fragments': [4]},
+    'full': {'base': (2000, 25, 2, 1),
+             'paragraphs': [250, 8000, 20000],
+             'labels': [5, 100, 400],
+             'refs': [1, 8, 32],
+             'fragments': [2, 4, 16]}}
+
+
+# Function that returns the cases of a suite, the base case first
+def suiteCases(name):
+    suite = suites[name]
+    cases = [suite['base']]
+    for i, key in enumerate(['paragraphs', 'labels', 'refs', 'fragments']):
+        for value in suite[key]:
+            case = list(suite['base'])
+            case[i] = value
+            if tuple(case) not in cases:
+                cases.append(tuple(case))
+    return cases
+
+
+def caseName(case):
+    return 'p%d_l%d_r%d_f%d' % case
+
+
+def runCase(path, args, repeat):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        runCase                                                                   #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Times the phases of WordTea on one document. Every repetition loads a     #
+    #        new document, the best time of every phase is returned.                   #
+    ####################################################################################
+    """
+    best = dict((phase, float('inf')) for phase in phases)
+    with open(path, 'rb') as f:
+        data = f.read()
+    out_file = path + '.out.docx'
+    for n in range(repeat):
+        times = dict()
+        # The status prints of WordTea are not part of the measurement
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            if args.engine == 'stream':
+                document = None
+            else:
+                document = Document(io.BytesIO(data))
+            times['load'] = time.perf_counter() - start
+            scanner = WordTea.createScanner(args)
+            start = time.perf_counter()
+            WordTea.buildReferences(document, path, scanner, args)
+            times['build'] = time.perf_counter() - start
+            start = time.perf_counter()
+            WordTea.replaceReferences(document, path, out_file, scanner, args)
+            times['replace'] = time.perf_counter() - start
+        for phase in phases:
+            best[phase] = min(best[phase], times[phase])
+    if os.path.isfile(out_file):
+        os.remove(out_file)
+    return best
+
+
+# Function that compares the results with a baseline, returns the regressions
+def compareBaseline(results, baseline, threshold, floor):
+    regressions = list()
+    old = dict((case['name'], case) for case in baseline['cases'])
+    print("\n%-24s %-8s %10s %10s %8s" % ("Case", "Phase", "Base (s)", "Now (s)", "Ratio"))
+    for case in results['cases']:
+        if case['name'] not in old:
+            continue
+        for phase in phases:
+            before = old[case['name']][phase]
+            now = case[phase]
+            ratio = now / before if before > 0 else float('inf')
+            flag = ''
+            # Very short phases are noise, they need to be slower by more than the floor too
+            if ratio > 1 + threshold and now - before > floor:
+                flag = '  << REGRESSION'
+                regressions.append((case['name'], phase, before, now))
+            print("%-24s %-8s %10.4f %10.4f %7.2fx%s" % (case['name'], phase, before, now, ratio, flag))
+    return regressions
+
+
+def __main__():
+    parser = argparse.ArgumentParser(description='WordTea: Benchmark suite of the build and replace phases.')
+    parser.add_argument('--suite', choices=sorted(suites), default='quick', help='Set of cases, default quick.')
+    parser.add_argument('-n', metavar='repeat', type=int, default=3, help='Number of repetitions of every case, the best one is kept, default 3.')
+    parser.add_argument('--engine', choices=['docx', 'stream'], default='docx', help='Processing engine, default docx.')
+    parser.add_argument('-o', metavar='results', default=None, help='Write the results to this JSON file.')
+    parser.add_argument('--baseline', metavar='baseline', default=None, help='Results JSON file of an earlier run to compare with.')
+    parser.add_argument('--threshold', metavar='threshold', type=float, default=0.25, help='Relative slow-down that is flagged as a regression, default 0.25 (25%%).')
+    parser.add_argument('--floor', metavar='seconds', type=float, default=0.005, help='Minimum absolute slow-down that is flagged, default 0.005 s.')
+    args = parser.parse_args()
+
+    # Options of WordTea, without the status prints of verbose level 1
+    options = argparse.ArgumentParser()
+    WordTea.addOptions(options)
+    wt_args = options.parse_args(['--silent', '--pdf', 'none', '--engine', args.engine])
+
+    results = {'meta': {'suite': args.suite,
+                        'engine': args.engine,
+                        'repeat': args.n,
+                        'python': platform.python_version(),
+                        'platform': platform.platform(),
+                        'date': time.strftime('%Y-%m-%d %H:%M:%S')},
+               'cases': list()}
+    print("%-24s %8s %10s %10s %10s %10s" % ("Case", "Runs", "Load (s)", "Build (s)", "Replace (s)", "Total (s)"))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for case in suiteCases(args.suite):
+            path = os.path.join(tmp_dir, caseName(case) + '.docx')
+            counts = generateDocument(path, *case)
+            best = runCase(path, wt_args, args.n)
+            entry = {'name': caseName(case),
+                     'fragments': case[3]}
+            entry.update(counts)
+            entry.update(best)
+            results['cases'].append(entry)
+            print("%-24s %8d %10.4f %10.4f %10.4f %10.4f" % (entry['name'], counts['runs'], best['load'], best['build'], best['replace'], sum(best.values())))
+            os.remove(path)
+
+    if not (args.o is None):
+        with open(args.o, 'w') as f:
+            json.dump(results, f, indent=2)
+        print("\nResults written to " + args.o)
+    if not (args.baseline is None):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('engine') != args.engine:
+            print("!!!WARNING!!! The baseline was made with the " + str(baseline['meta'].get('engine')) + " engine.")
+        regressions = compareBaseline(results, baseline, args.threshold, args.floor)
+        if regressions:
+            print("\n" + str(len(regressions)) + " regressions found.")
+            return 1
+        print("\nNo regressions found.")
+    return 0
+
+
+if __name__ == "__main__":
+    if __main__():
+        sys.exit(1)
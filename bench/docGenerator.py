@@ -0,0 +1,121 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Generator of synthetic .docx files for the benchmarks. The size of the
+# document is set by the number of paragraphs, the number of labels of every
+# kind, the number of references to every label and the number of runs every
+# label and reference is split in (Word splits text in many runs when it is
+# edited, e.g. by the spell checker or the revision marks).
+#
+# Run from the repository root:
+#   $ python bench/docGenerator.py big.docx -p 5000 -l 100 -r 3 -f 4
+
+import argparse
+import random
+from docx import Document
+
+kinds = ['fig', 'sec1', 'sec2', 'sec3', 'sec4', 'tbl', 'eq', 'cite']
+filler = 'Video provides a powerful way to help you prove your point. When you click Online Video, you can paste in the embed code for the video you want to add. '
+
+
+# Function that splits a text in n parts of (almost) the same length
+def splitText(text, n):
+    n = max(1, min(n, len(text)))
+    size = len(text) / n
+    return [text[int(i * size):int((i + 1) * size)] for i in range(n)]
+
+
+def generateDocument(path, paragraphs, labels, refs, fragments, seed=0):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        generateDocument                                                          #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Writes a synthetic document. Every kind gets the given number of labels  #
+    #        and every label is referenced refs times. The labels and references are  #
+    #        spread over the paragraphs in a random (but repeatable) order, with       #
+    #        filler text around them.                                                  #
+    #                                                                                  #
+    # Input Arguments:                                                                 #
+    #        path      : Path of the .docx file                                        #
+    #        paragraphs: Number of paragraphs                                          #
+    #        labels    : Number of labels of every kind                                #
+    #        refs      : Number of references to every label                           #
+    #        fragments : Number of runs every label and reference is split in          #
+    #        seed      : Seed of the random order                                      #
+    #                                                                                  #
+    # Return Arguments:                                                                #
+    #        counts    : Dictionary with the number of paragraphs, labels, references  #
+    #                    and runs of the document                                      #
+    ####################################################################################
+    """
+    markers = list()
+    for i in range(labels):
+        for kind in kinds:
+            markers.append('^' + kind + '{' + kind + str(i) + '}^')
+    for r in range(refs):
+        for i in range(labels):
+            for kind in kinds:
+                markers.append('`' + kind + '{' + kind + str(i) + '}`')
+    random.Random(seed).shuffle(markers)
+
+    document = Document()
+    runs = 0
+    for j in range(paragraphs):
+        pr = document.add_paragraph()
+        pr.add_run(filler)
+        runs += 1
+        # Markers of this paragraph, spread evenly over the paragraphs
+        for marker in markers[j * len(markers) // paragraphs:(j + 1) * len(markers) // paragraphs]:
+            for part in splitText(marker, fragments):
+                pr.add_run(part)
+                runs += 1
+            pr.add_run(' ' + filler)
+            runs += 1
+    document.save(path)
+    return {'paragraphs': paragraphs,
+            'labels': labels * len(kinds),
+            'references': refs * labels * len(kinds),
+            'runs': runs}
+
+
+def __main__():
+    parser = argparse.ArgumentParser(description='WordTea: Generator of synthetic documents for the benchmarks.')
+    parser.add_argument('outFile', help='Path to the output .docx file.')
+    parser.add_argument('-p', metavar='paragraphs', type=int, default=1000, help='Number of paragraphs, default 1000.')
+    parser.add_argument('-l', metavar='labels', type=int, default=25, help='Number of labels of every kind, default 25.')
+    parser.add_argument('-r', metavar='refs', type=int, default=2, help='Number of references to every label, default 2.')
+    parser.add_argument('-f', metavar='fragments', type=int, default=1, help='Number of runs every label and reference is split in, default 1.')
+    parser.add_argument('--seed', metavar='seed', type=int, default=0, help='Seed of the order of the labels and references, default 0.')
+    args = parser.parse_args()
+    if args.p < 1 or args.l < 0 or args.r < 0 or args.f < 1:
+        raise ValueError("-p and -f must be at least 1, -l and -r not negative")
+    counts = generateDocument(args.outFile, args.p, args.l, args.r, args.f, args.seed)
+    print("Generated " + args.outFile + ": " + ", ".join(key + " " + str(value) for key, value in counts.items()))
+
+
+if __name__ == "__main__":
+    __main__()
@@ -0,0 +1,105 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+# Benchmark of the start up time of the entry points. Every command is run
+# in a new interpreter, as a user would run it, and the best and the median
+# wall time of the repetitions are printed. With --modules the modules that
+# take the longest to import (python -X importtime) are listed as well.
+#
+# Run from the repository root:
+#   $ python bench/importBench.py -n 10 --modules 10
+
+import sys
+import os
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from docGenerator import generateDocument
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+
+# Function that returns the commands to be timed, (name, arguments of python)
+def commands(doc):
+    wordtea = os.path.join(SRC, 'WordTea.py')
+    return [('python (empty)', ['-c', 'pass']),
+            ('WordTea.py --help', [wordtea, '--help']),
+            ('WordTea.py --check', [wordtea, doc, '--check', '--silent']),
+            ('WordTea.py stream', [wordtea, doc, os.path.join(os.path.dirname(doc), 'small.pdf'), '--pdf', 'none', '--engine', 'stream', '--silent']),
+            ('WordTea.py docx', [wordtea, doc, os.path.join(os.path.dirname(doc), 'small.pdf'), '--pdf', 'none', '--silent']),
+            ('import wordTeaApi', ['-c', 'import wordTeaApi'])]
+
+
+# Function that runs a command n times and returns the wall times
+def timeCommand(args, n):
+    env = dict(os.environ, PYTHONPATH=SRC)
+    times = list()
+    for i in range(n):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+# Function that returns the (cumulative time, module) of the slowest top level
+# imports of a command, from python -X importtime
+def slowestImports(args, count):
+    env = dict(os.environ, PYTHONPATH=SRC)
+    out = subprocess.run([sys.executable, '-X', 'importtime'] + args, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True).stderr
+    rtn = list()
+    for line in out.splitlines():
+        parts = line.split('|')
+        # Only the imports of the command itself, not the ones they contain
+        if len(parts) == 3 and parts[1].strip().isdigit() and not parts[2].startswith('  '):
+            rtn.append((int(parts[1]), parts[2].strip()))
+    return sorted(rtn, reverse=True)[:count]
+
+
+def __main__():
+    parser = argparse.ArgumentParser(description='WordTea: Benchmark of the start up time of the entry points.')
+    parser.add_argument('-n', metavar='repeat', type=int, default=5, help='Number of runs of every command, default 5.')
+    parser.add_argument('--modules', metavar='count', type=int, default=0, help='Also list the slowest imports of every command, default 0 (no list).')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        doc = os.path.join(tmp_dir, 'small.docx')
+        generateDocument(doc, 50, 5, 2, 1)
+        print("%-24s %10s %10s" % ("Command", "Best (s)", "Median (s)"))
+        for name, cmd in commands(doc):
+            times = timeCommand(cmd, args.n)
+            print("%-24s %10.4f %10.4f" % (name, min(times), statistics.median(times)))
+            if args.modules > 0:
+                for usec, module in slowestImports(cmd, args.modules):
+                    print("    %-32s %8.1f ms" % (module, usec / 1000.0))
+    return 0
+
+
+if __name__ == "__main__":
+    if __main__():
+        sys.exit(1)
@@ -0,0 +1,121 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+# Micro-benchmark of the label matching. Compares the matching with the
+# pattern strings built on every call and for every kind (as Match_label,
+# Match_Tag and FindLabelInText used to do) against the labelScanner, that
+# finds the labels of all the kinds in one pass (scan, build phase) and
+# replaces the tags of a paragraph in one pass (replaceRuns, replace phase),
+# on the text of a synthetic document.
+#
+# Run from the repository root:
+#   $ python bench/patternBench.py -p 2000 -n 5
+
+import sys
+import os
+import re
+import argparse
+import timeit
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from docx import Document
+import WordTea
+from wordTeaApi import options
+
+kinds = ['fig', 'sec1', 'sec2', 'sec3', 'sec4', 'tbl', 'eq', 'cite']
+filler = 'Video provides a powerful way to help you prove your point. When you click Online Video, you can paste in the embed code for the video you want to add. '
+
+
+# Build a synthetic document and return the text of its paragraphs
+def syntheticText(paragraphs):
+    document = Document()
+    for i in range(paragraphs):
+        kind = kinds[i % len(kinds)]
+        if i % 4 == 0:
+            document.add_paragraph(filler + '^' + kind + '{label' + str(i) + '}^')
+        elif i % 4 == 1:
+            # The tag of the label of the previous paragraph
+            document.add_paragraph(filler + '`' + kinds[(i - 1) % len(kinds)] + '{label' + str(i - 1) + '}` ' + filler)
+        else:
+            document.add_paragraph(filler + filler)
+    return [pr.text for pr in document.paragraphs]
+
+
+# Matching with the pattern strings rebuilt on every call
+def legacyMatch(texts):
+    for text in texts:
+        low = text.lower()
+        for label in kinds:
+            if re.search(r"\^\s*" + label + r"\s*\{[^\^]+\}\s*\^", text, re.I):
+                re.findall(r"\^\s*" + label.lower() + r"\s*\{([^\}]+)\}\s*\^", low)
+            if re.search(r"`\s*" + label + r"\s*\{[^`]+\}\s*`", text, re.I):
+                for ref in re.findall(r"`\s*" + label.lower() + r"\s*\{([^\}]+)\}\s*`", low):
+                    toReplace = r"`\s*" + label + r"\s*\{\s*" + ref + r"\s*\}\s*`"
+                    re.sub(toReplace, '1', low)
+
+
+# Run with only the text, the runs given to replaceRuns
+class textRun:
+    def __init__(self, text):
+        self.text = text
+
+
+# Scanner with the labels of the texts declared and the number tables built
+def buildScanner(texts):
+    scanner = WordTea.createScanner(options())
+    for text in texts:
+        for [symbol, kind, label, start, end] in scanner.scan(text):
+            if symbol == '^':
+                scanner.declare(symbol, kind, label, False, False)
+    scanner.buildTables(False)
+    return scanner
+
+
+# Matching with the scanner, the scan of the build phase and the replace of
+# the replace phase
+def scannerMatch(texts, scanner):
+    for text in texts:
+        scanner.scan(text)
+        scanner.replaceRuns([textRun(text)], False, False)
+
+
+def __main__():
+    parser = argparse.ArgumentParser(description='WordTea: Micro-benchmark of the label matching.')
+    parser.add_argument('-p', metavar='paragraphs', type=int, default=2000, help='Number of paragraphs of the synthetic document, default 2000.')
+    parser.add_argument('-n', metavar='repeat', type=int, default=5, help='Number of repetitions, the best one is reported, default 5.')
+    args = parser.parse_args()
+
+    texts = syntheticText(args.p)
+    scanner = buildScanner(texts)
+    before = min(timeit.repeat(lambda: legacyMatch(texts), number=1, repeat=args.n))
+    after = min(timeit.repeat(lambda: scannerMatch(texts, scanner), number=1, repeat=args.n))
+    print("Paragraphs            : " + str(len(texts)))
+    print("Pattern strings (s)   : %.4f" % before)
+    print("Label scanner (s)     : %.4f" % after)
+    print("Speed-up              : %.2fx" % (before / after))
+
+
+if __name__ == "__main__":
+    __main__()
@@ -0,0 +1,103 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Benchmark suite of the build and replace phases. Synthetic documents
+# Load test of the server mode (WordTeaServer.py). A number of client threads
+# upload a generated document (see docGenerator.py) to a running server with
+# wait=1, as fast as they can, for a fixed time. The throughput, the latency
+# percentiles and the number of uploads refused with 503 (queue full) are
+# printed, with the /metrics of the server at the end.
+#
+# Start the server and run from the repository root:
+#   $ python src/WordTeaServer.py -j 4 --pdf none &
+#   $ python bench/serverLoad.py -c 8 -t 20
+
+import sys
+import os
+import json
+import time
+import argparse
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from docGenerator import generateDocument
+
+
+# Function that uploads the document until the end time, the status and the
+# latency of every upload are added to results
+def client(url, data, end, results):
+    while time.perf_counter() < end:
+        request = urllib.request.Request(url + '/jobs?wait=1', data=data, method='POST')
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                code = response.status
+        except urllib.error.HTTPError as e:
+            code = e.code
+        latency = time.perf_counter() - start
+        results.append((code, latency))
+        # Back off as the server asks
+        if code == 503:
+            time.sleep(0.05)
+
+
+def __main__():
+    parser = argparse.ArgumentParser(description='WordTea: Load test of the server mode.')
+    parser.add_argument('--url', default='http://127.0.0.1:8080', help='Address of the server, default http://127.0.0.1:8080.')
+    parser.add_argument('-c', metavar='clients', type=int, default=8, help='Number of concurrent clients, default 8.')
+    parser.add_argument('-t', metavar='seconds', type=float, default=10, help='Duration of the test, default 10 s.')
+    parser.add_argument('-p', metavar='paragraphs', type=int, default=500, help='Paragraphs of the generated document, default 500.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'load.docx')
+        generateDocument(path, args.p, 10, 2, 1, 1)
+        with open(path, 'rb') as f:
+            data = f.read()
+    results = list()
+    end = time.perf_counter() + args.t
+    threads = [threading.Thread(target=client, args=(args.url, data, end, results)) for i in range(args.c)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ok = sorted(latency for code, latency in results if code == 200)
+    rejected = len([code for code, latency in results if code == 503])
+    print("Uploads: %d, ok: %d, rejected (503): %d, other errors: %d" % (len(results), len(ok), rejected, len(results) - len(ok) - rejected))
+    print("Throughput: %.2f documents/s" % (len(ok) / args.t))
+    if ok:
+        print("Latency (s): p50 %.4f, p90 %.4f, p99 %.4f, max %.4f" % tuple(ok[min(len(ok) - 1, int(q * len(ok)))] for q in [0.5, 0.9, 0.99, 1.0]))
+    with urllib.request.urlopen(args.url + '/metrics') as response:
+        print("Server metrics: " + json.dumps(json.load(response)))
+    return int(len(ok) == 0)
+
+
+if __name__ == "__main__":
+    if __main__():
+        sys.exit(1)
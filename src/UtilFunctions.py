@@ -27,11 +27,10 @@
 # TODO : Comment the functions
 # TODO : Create a util class
 
-import re
-import comtypes.client
-import docx
-from docx import Document
-from docx.shared import Inches
+import sys
+import bisect
+from array import array
+import stats
 
 
 # Function to convert integer to latin numera
@@ -41,10 +40,10 @@ def int_to_roman(input):
     if not isinstance(input, type(1)):
         raise TypeError(
             "Integer to Latin: Expected integer, got %s" % type(input))
-    if not 0 < input < 21:
-        raise ValueError("Integer to Latin: Argument must be between 1 and 20")
-    ints = (40, 10,  9,   5,  4,   1)
-    nums = ('XL', 'X', 'IX', 'V', 'IV', 'I')
+    if not 0 < input:
+        raise ValueError("Integer to Latin: Argument must be a positive integer")
+    ints = (1000, 900, 500, 400, 100, 90, 50, 40, 10, 9, 5, 4, 1)
+    nums = ('M', 'CM', 'D', 'CD', 'C', 'XC', 'L', 'XL', 'X', 'IX', 'V', 'IV', 'I')
     result = []
     for i in range(len(ints)):
         count = int(input / ints[i])
@@ -52,212 +51,177 @@ def int_to_roman(input):
         input -= ints[i] * count
     return ''.join(result)
 
-# Function to convert integer to small letters
+# Function to convert integer to letters, 1 is the first letter of nums and
+# after the last letter the numbering continues with two letters (z, aa, ab, ...)
 
 
-def int_to_small(input):
+def int_to_letters(input, nums):
     if not isinstance(input, type(1)):
         raise TypeError(
-            "Integer to Latin: Expected integer, got %s" % type(input))
-    if not 0 < input < 21:
-        raise ValueError("Integer to Latin: Argument must be between 1 and 20")
-    nums = ('a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j',
-            'k', 'l', 'm', 'n', 'o', 'p', 'q', 'r', 's', 't')
-    return nums[input]
+            "Integer to Letter: Expected integer, got %s" % type(input))
+    if not 0 < input:
+        raise ValueError("Integer to Letter: Argument must be a positive integer")
+    result = []
+    while input > 0:
+        input, rem = divmod(input - 1, len(nums))
+        result.append(nums[rem])
+    return ''.join(reversed(result))
+
+# Function to convert integer to small letters
+
+
+def int_to_small(input):
+    return int_to_letters(input, 'abcdefghijklmnopqrstuvwxyz')
 
 # Function to convert integer to capital letters
 
 
 def int_to_cap(input):
-    if not isinstance(input, type(1)):
-        raise TypeError(
-            "Integer to Latin: Expected integer, got %s" % type(input))
-    if not 0 < input < 21:
-        raise ValueError("Integer to Latin: Argument must be between 1 and 20")
-    nums = ('A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J',
-            'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'E', 'S', 'T')
-    return nums[input]
-
-# Function to match and remove a label inside paragraph text
-
-
-def Match_label(inline, j, label, found, v2, v1, error):
-    tmp_txt = ''
-    if ('^' in inline[j].text):
-        found = True
-        tmp_txt = inline[j].text
-        if v2:
-            print('First inline: '+inline[j].text)
-        k = 1
-        flag = True
-        pattern = r"\^\s*"+label+r"\s*\{[^\^]+\}\s*\^"
-        while flag:
-            if re.search(pattern, tmp_txt, re.I):
-                if v2:
-                    print('##########################################################')
-                    print('             Full Label found:                            ')
-                    print(' Label : ' + tmp_txt)
-                    print('##########################################################')
-                # Remove the label from the inline text
-                flag = False  # Exit the loop if you find the full label
-                found = True
-            else:
-                if '^' in inline[j + k].text:
-                    # Remove the initial part of the label from the first inline text
-                    # toRemove = r'\^[^\^]*$'
-                    # inline[j].text = re.sub(toRemove, '', inline[j].text)
-                    if v2:
-                        print('##########################################################')
-                        print('                Label is in pieces                        ')
-                        print('Inline text: ' + inline[j + k].text + ', k = ' + str(k) + ', j = ' + str(j))
-                    split_text = re.split(r'\^', inline[j + k].text)
-                    inline[j].text += inline[j + k].text
-                    tmp_txt += (split_text[0].lower() + '^')
-                    if v2:
-                        print('Text list :')
-                        print(split_text)
-                        print('Final temporary text = ' + tmp_txt)
-                    # inline[j + k].text = split_text[1]
-                    inline[j + k].text = ''
-                    if v2:
-                        print('New inline text: ' + inline[j + k].text + ', k = ' + str(k) + ', j = ' + str(j))
-                        print('##########################################################')
-                    flag = False  # Exit the loop if you complete the label
-                else:
-                    if v2:
-                        print('##########################################################')
-                        print('                Label is in pieces                        ')
-                        print('Inline text: ' + inline[j + k].text + ', k = ' + str(k) + ', j = ' + str(j))
-                    inline[j].text += inline[j + k].text.lower()
-                    tmp_txt += inline[j + k].text.lower()
-                    temporary_check = j + k
-                    if (temporary_check < (len(inline) - 1)):
-                        inline[j + k].text = ''
-                        k += 1
-                    else:
-                        print("!!!WARNING!!! Incomplete label :" + inline[j].text)
-                        flag = False
-                        error = True
-                        found = False
-        if v2:
-            print("inline text after assembly:")
-            print(inline[j].text)
-        if re.search(pattern, inline[j].text, re.I):
-            if v2:
-                print("Info: Found label :")
-                print(re.findall(pattern, inline[j].text, re.I))
-                print("Info: Removing text from inline")
-            inline[j].text = re.sub(pattern, '', inline[j].text.lower())
-            if v2:
-                print("Info: inline after remove:")
-                print(inline[j].text)
-                print("Info: Returning text: " + tmp_txt)
-            found = True
-        else:
-            if v2:
-                print("Info: pattern not found. Label was :" + label + "\n\t Inline text is : " + inline[j].text)
-                print("\t Returning empty!")
-                tmp_txt = ""
-                found = False
-    return [tmp_txt.lower(), found]
-
-# Function to find a label inside a string
-
-
-def FindLabelInText(text, label, start, end, v2, v1):
-    regex = start + label.lower() + end
-    tmp = re.findall(regex, text)
-    if v1:
-        print("Labels found in text :")
-        print(tmp)
-    return tmp
-
-
-# Function to match and remove tags inside paragraph text
-
-
-def Match_Tag(inline, j, label, found, v2, v1, error):
-    tmp_txt = ''
-    if ('`' in inline[j].text):
-        found = False
-        tmp_txt = inline[j].text
-        if v2:
-            print('First inline: '+tmp_txt)
-        k = 1
-        flag = True
-        pattern = r"`\s*"+label+r"\s*\{[^`]+\}\s*`"
-        while flag:
-            if re.search(pattern, tmp_txt, re.I):
-                if v2:
-                    print('##########################################################')
-                    print('             Full Tag found:                              ')
-                    print(' Tag : ' + tmp_txt)
-                    print('##########################################################')
-                # Remove the label from the inline text
-                #inline[j].text = re.sub(pattern, '', inline[j].text)
-                flag = False  # Exit the loop if you find the full label
-                found = True
+    return int_to_letters(input, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+
+class runBuffer:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        runBuffer                                                                 #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        The joined text of the runs of a paragraph together with a map from the   #
+    #        character offsets of the joined text to the runs. Labels and tags are     #
+    #        matched once on the joined text and marked with replace. apply writes the #
+    #        changes only to the runs that overlap a match: the new text goes to the   #
+    #        run where the match starts and the rest of the match is removed from the  #
+    #        following runs. Works with any object that has a text attribute, e.g.     #
+    #        python-docx runs or w:t elements.                                         #
+    ####################################################################################
+    """
+
+    def __init__(self, runs):
+        self.runs = list(runs)
+        self.parts = list()
+        self.starts = list()
+        # ends[k] is the offset after the last character of run k
+        self.ends = list()
+        pos = 0
+        for run in self.runs:
+            txt = run.text
+            if txt is None:
+                txt = ''
+            self.parts.append(txt)
+            self.starts.append(pos)
+            pos += len(txt)
+            self.ends.append(pos)
+        self.text = ''.join(self.parts)
+        self.edits = list()
+        if stats.active is not None:
+            stats.active.count('paragraphs')
+            stats.active.count('runs', len(self.runs))
+
+    # Replaces the text between the offsets start and end of the joined text
+    def replace(self, start, end, txt):
+        self.edits.append((start, end, txt))
+
+    # Writes the replacements to the runs and returns the changed runs
+    def apply(self):
+        changed = set()
+        # Right to left, the text on the left of a replacement is never changed
+        # by it, so the offsets of the remaining replacements stay valid
+        for start, end, txt in sorted(self.edits, reverse=True):
+            if end <= start:
+                continue
+            first = bisect.bisect_right(self.ends, start)
+            last = bisect.bisect_right(self.ends, end - 1)
+            head = self.parts[first][:start - self.starts[first]]
+            tail = self.parts[last][end - self.starts[last]:]
+            if first == last:
+                self.parts[first] = head + txt + tail
             else:
-                if '`' in inline[j + k].text:
-                    if v2:
-                        print('##########################################################')
-                        print('                Label is in pieces                        ')
-                        print('Inline text: ' + inline[j + k].text + ', k = ' + str(k) + ', j = ' + str(j))
-                    split_text = re.split(r'\`', inline[j + k].text)
-                    inline[j].text += inline[j + k].text
-                    tmp_txt += (split_text[0].lower() + '`')
-                    if v2:
-                        print('Text list :')
-                        print(split_text)
-                        print('Final temporary text = ' + tmp_txt)
-                    # inline[j + k].text = split_text[1]
-                    inline[j + k].text = ''
-                    find = True
-                    if v2:
-                        print('New inline text: ' + inline[j + k].text + ', k = ' + str(k) + ', j = ' + str(j))
-                        print('##########################################################')
-                    flag = False  # Exit the loop if you complete the label
-                else:
-                    if v2:
-                        print('##########################################################')
-                        print('                Label is in pieces                        ')
-                        print('Inline text: ' + inline[j + k].text + ', k = ' + str(k) + ', j = ' + str(j))
-                    inline[j].text += inline[j + k].text
-                    tmp_txt += inline[j + k].text.lower()
-                    temporary_check = j + k
-                    if (temporary_check < (len(inline) - 1)):
-                        inline[j + k].text = ''
-                        k += 1
-                    else:
-                        print("!!!WARNING!!! Incomplete label :" + inline[j].text)
-                        flag = False
-                        error = True
-                        found = False
-        if v2:
-            print("inline text after assembly:")
-            print(inline[j].text)
-        if re.search(pattern, inline[j].text, re.I):
-            if v2:
-                print("Info: Found label :")
-                print(re.findall(pattern, inline[j].text, re.I))
-        else:
-            if v2:
-                print("Info: pattern not found. Label was : " + label + "\n\t Inline text is : " + inline[j].text)
-                print("\t Returning empty!")
-                tmp_txt = ""
-                found = False
-    return [tmp_txt, found]
+                self.parts[first] = head + txt
+                for k in range(first + 1, last):
+                    self.parts[k] = ''
+                self.parts[last] = tail
+            changed.update(range(first, last + 1))
+        self.edits = list()
+        rtn = list()
+        for k in sorted(changed):
+            self.runs[k].text = self.parts[k]
+            rtn.append(self.runs[k])
+        self.text = ''.join(self.parts)
+        if stats.active is not None:
+            stats.active.count('runs_rewritten', len(rtn))
+        return rtn
+
+
+class entryStore:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        entryStore                                                                #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        The entries of a reference list, one record per declared label stored in  #
+    #        columns: the interned labels, and integer arrays with the number of the   #
+    #        entry, the counter of the parent list when it was declared and the flag  #
+    #        that the entry is referenced. The columns always have the same length,    #
+    #        entries are only added at the end or removed from the end (truncate).     #
+    ####################################################################################
+    """
+
+    def __init__(self):
+        self.labels = list()
+        self.counts = array('i')
+        self.parents = array('i')
+        self.checks = bytearray()
+        # Label -> position of the entry
+        self.index = dict()
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __contains__(self, label):
+        return label in self.index
+
+    # Adds an entry and returns its position
+    def add(self, label, count, parent):
+        label = sys.intern(label)
+        pos = len(self.labels)
+        self.index[label] = pos
+        self.labels.append(label)
+        self.counts.append(count)
+        self.parents.append(parent)
+        self.checks.append(0)
+        return pos
+
+    # Returns the position of a label, or None
+    def find(self, label):
+        return self.index.get(label)
+
+    # Marks the entry at pos as referenced
+    def mark(self, pos):
+        self.checks[pos] = 1
+
+    # Returns the labels of the entries that are not referenced, in order
+    def unreferenced(self):
+        return [self.labels[i] for i in range(len(self.labels)) if self.checks[i] == 0]
+
+    # Returns a copy of the entries, without the referenced flags
+    def getState(self):
+        return {'labels': list(self.labels), 'counts': array('i', self.counts), 'parents': array('i', self.parents)}
+
+    # Replaces the entries with the first keep entries of a state from getState
+    def setState(self, state, keep):
+        self.labels = [sys.intern(label) for label in state['labels'][:keep]]
+        self.counts = array('i', state['counts'][:keep])
+        self.parents = array('i', state['parents'][:keep])
+        self.checks = bytearray(keep)
+        self.index = dict((label, i) for i, label in enumerate(self.labels))
+
+
+# Formatting functions of the reference styles
+formatList = {1: str, 2: int_to_roman, 3: int_to_small, 4: int_to_cap}
 
 
 # Function that transforms a number to a string according to the specifications of the formating
 def formatSelect(i, style):
-    rtn = ''
-    if (style == 1):
-        rtn = str(i)
-    elif (style == 2):
-        rtn = int_to_roman(i)
-    elif (style == 3):
-        rtn = int_to_small(i)
-    else:
-        rtn = int_to_cap(i)
-    return rtn
+    return formatList.get(style, int_to_cap)(i)
@@ -31,52 +31,49 @@
 import sys
 import argparse
 import os
-import re
-import comtypes.client
-import csv
-import docx
-import referenceList
+import io
+import tempfile
+import time
+import json
+import stats
+from logSetup import log, setupLogging, PROCESS
 from referenceList import referenceList
-from docx import Document
-from docx.shared import Inches
+from labelScanner import labelScanner
+from labelCache import labelCache
+from storyIterator import iterParagraphs, fallbackParagraphs
+from bibtex import loadBibliography, bibliographyLines, expandMarker, BIB_MARKER
+from pdfConverter import getConverter, defaultConverter, converterNames
+# python-docx and lxml take most of the start up time, they are imported by
+# the stages that use them (see loadDocument, buildReferences, etc.), so
+# --help, --check and the stream engine do not load what they do not use.
 
-# FIXME Bug when multiple labels are in one inline
 # TODO There is bug that removes footnotes.
-# TODO add functionality for reference from bibtex file
 
 
-def __main__():
-    ###########################################################
-    # Use parser to get the cmd arguments #####################
-    ###########################################################
-    parser = argparse.ArgumentParser(description='WordTea: Word document parser. Generates citations and cross-references from latex like text in word document files.')
-    parser.add_argument('inFile', help='Path to the input file.')
-    parser.add_argument('pdfFile', help='Path to the output pdf file.')
-    parser.add_argument('tmpFile', help='Path to the output temporary file.')
-    parser.add_argument('-r', metavar='ref', help='Path to the reference file (if a reference file is to be used). !!!Not supported!!!')
+###############################################################
+# Options shared by all the entry points ######################
+###############################################################
+def addOptions(parser):
+    parser.add_argument('-r', metavar='ref', help='Path to a BibTeX (.bib) file. The citations (`cite{key}`) of its keys are numbered in the order they first appear, and a paragraph with ^bibliography^ is replaced by the reference list.')
     parser.add_argument('--silent', action='store_false', help='Disable Verbose level 1, basic status print for missed references and citations inside the document')
     parser.add_argument('--verbose', action='store_true', help='Enable Verbose level 2, extreme error print for script debug')
     parser.add_argument('-s1', metavar='s1_format', help='Format of the section 1 reference style. Use 1 for normal numbering, 2 for Latin, 3 for small letter, 4 for capital letter, default 1.', default=1)
     parser.add_argument('-s2', metavar='s2_format', help='Format of the section 2 reference style. Use 1 for normal numbering, 2 for Latin, 3 for small letter, 4 for capital letter, default 1.', default=1)
     parser.add_argument('-s3', metavar='s3_format', help='Format of the section 3 reference style. Use 1 for normal numbering, 2 for Latin, 3 for small letter, 4 for capital letter, default 1.', default=1)
     parser.add_argument('-table', metavar='table_format', help='Format of the table reference style. Use 1 for normal numbering, 2 for Latin, 3 for small letter, 4 for capital letter, default 1.', default=1)
+    parser.add_argument('--engine', choices=['docx', 'stream'], default='docx', help='Processing engine. docx uses python-docx, stream parses word/document.xml incrementally with bounded memory, for very large documents. Default docx.')
+    parser.add_argument('--pdf', choices=converterNames, default=defaultConverter(), help='Backend of the pdf conversion. word uses Microsoft Word (Windows only), libreoffice uses a local headless LibreOffice, none only keeps the post-processed .docx file. Default the WORDTEA_PDF environment variable, or word on Windows and libreoffice on other systems.')
+    parser.add_argument('--soffice', metavar='soffice', default=None, help='Path to the LibreOffice soffice executable, default found in the PATH.')
+    parser.add_argument('--log-file', metavar='log_file', default=None, help='Write the messages to this file (with the time and the level of each message) instead of the console.')
+    parser.add_argument('--stats', metavar='stats_file', default=None, help='Write the statistics of the run (time of every phase, paragraphs and runs visited, regular expression evaluations, labels resolved, runs rewritten and peak resident memory) to a JSON file.')
+    parser.add_argument('--cache', metavar='cache_file', nargs='?', const='', default=None, help='Keep the label database in a cache file and only rescan the paragraphs that changed since the last run. Default file is the input file name with .wtcache appended.')
+    return parser
 
-    args = parser.parse_args()
-
-    ############################################################
-
-    # Constant used for the pdf creation
-    wdFormatPDF = 17
 
-    #################################################
-    # Reading the arguments of the command to #######
-    # the variables used in the script        #######
-    #################################################
-    in_file = os.path.abspath(args.inFile)
-    out_file = os.path.abspath(args.pdfFile)
-    tmp_file = os.path.abspath(args.tmpFile)
-    v1 = args.silent
-    v2 = args.verbose
+###############################################################
+# Check the options, raises an exception for wrong values #####
+###############################################################
+def checkOptions(args):
     s1_f = int(args.s1)
     s2_f = int(args.s2)
     s3_f = int(args.s3)
@@ -98,23 +95,53 @@ def __main__():
         raise ValueError("-s3 Argument must be between 1 and 4")
     if not 0 < tbl_f < 5:
         raise ValueError("-s1 argument must be between 1 and 4")
+    if not (args.r is None) and not os.path.isfile(args.r):
+        raise FileNotFoundError("-r reference file " + args.r + " not found")
+    return 1
 
-    if v2:
-        print(max)
 
-    #ref_file = ""
-    # if (args.r) != None:
-    #    ref_file = os.path.abspath(args.r)
+###############################################################
+# Stages of the processing of one document ####################
+###############################################################
+def loadDocument(in_file, args):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        loadDocument                                                              #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Load stage, reads the document in memory. Returns None for the stream     #
+    #        engine, that reads the file itself.                                       #
+    ####################################################################################
+    """
+    if args.engine == 'stream':
+        return None
+    from docx import Document
+    log.log(PROCESS, "Process: Open Document %s.", in_file)
+    # Reading the main document in memory, the input file is not touched again
+    with stats.phase('open'):
+        with open(in_file, 'rb') as f:
+            document = Document(io.BytesIO(f.read()))
+    log.log(PROCESS, "Process: File open.")
+    return document
 
-    #######################################
-    print("Process: Open Document " + str(in_file) + ".")
-    # Reading the main document
-    document = Document(in_file)
-    # Create the temporary document
-    document.save(tmp_file)
-    # Copy the main document to the temporary document
-    document = Document(tmp_file)
-    print("Process: File open.")
+
+def createScanner(args, save=True):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        createScanner                                                             #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Creates the reference lists with the styles of the options and the       #
+    #        scanner that serves them. The lists are in scanner.lists. With save      #
+    #        False the cache of the bibliography (-r) is read but never written.      #
+    ####################################################################################
+    """
+    s1_f = int(args.s1)
+    s2_f = int(args.s2)
+    s3_f = int(args.s3)
+    tbl_f = int(args.table)
 
     ###############################################################
     # Create the reference classes ################################
@@ -129,43 +156,158 @@ def __main__():
     cite = referenceList("Citations", "cite", "cite", 1, None)
     # Add more list here or adjust the above
     ###############################################################
-    #
-    print("Process: File open.")
+    # The scanner searches each paragraph once for all the lists
+    # If you have added new objects register them in the scanner
+    scanner = labelScanner([fig, equ, sec1, sec2, sec3, sec4, tbl, cite])
+    if not (args.r is None):
+        scanner.addBibliography(cite.label, loadBibliography(args.r, save))
+    return scanner
+
+
+def buildReferences(document, in_file, scanner, args):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        buildReferences                                                           #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Build phase, adds the declared labels to the lists of the scanner,       #
+    #        removes them from the document and creates the number tables. The        #
+    #        paragraphs with labels or tags are recorded for the replace phase.       #
+    ####################################################################################
+    """
+    v1 = args.silent
+    v2 = args.verbose
+    log.log(PROCESS, "Process: Start building the reference database.")
+    with stats.phase('build'):
+        scanner.startLocations()
+        cache = None
+        if args.cache is not None:
+            cache = labelCache(args.cache or (in_file + '.wtcache'), scanner, v1, v2)
+        if args.engine == 'stream':
+            from streamEngine import streamEngine
+            # The stream engine builds the tables at the end of its pass
+            streamEngine(scanner, v1, v2).buildList(in_file, cache)
+        elif cache is not None:
+            for pr in iterParagraphs(document):
+                cache.buildList(pr)
+            markCopies(document, scanner)
+            # Adds the labels, creates the final reference text and saves the cache
+            cache.finish()
+        else:
+            for pr in iterParagraphs(document):
+                scanner.buildList(pr, v1, v2)
+            markCopies(document, scanner)
+            # Create the final reference text of all the labels
+            scanner.buildTables(v2)
+    log.log(PROCESS, "Process: Building of the reference database is completed.")
+    return 1
+
+
+def replaceReferences(document, in_file, tmp_file, scanner, args):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        replaceReferences                                                         #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Replace phase, replaces the tags with the reference text. The stream      #
+    #        engine reads in_file and writes the post-processed document to tmp_file, #
+    #        the docx engine changes document.                                         #
+    ####################################################################################
+    """
+    v1 = args.silent
+    v2 = args.verbose
+    with stats.phase('replace'):
+        if args.engine == 'stream':
+            from streamEngine import streamEngine
+            # The stream engine writes the post-processed document while replacing
+            log.log(PROCESS, "Process: Start searching the text for relevant lables.")
+            streamEngine(scanner, v1, v2).matchNreplace(in_file, tmp_file)
+        else:
+            log.log(PROCESS, "Process: Start searching the text for relevant lables.")
+            for pr in markedParagraphs(document, scanner):
+                scanner.matchNreplace(pr, v1, v2)
+            if scanner.bibliographies:
+                insertBibliography(document, scanner)
+    log.log(PROCESS, "Process: Search and replace of the labels in the text completed.")
+    if scanner.unresolved:
+        log.warning("!!!WARNING!!! %d paragraphs have tags that are not resolved:\n%s", len(scanner.unresolved), '\n'.join(', '.join(tags) + ' : ' + text for tags, text in scanner.unresolved))
+    return 1
+
+
+# Function that records the mc:Fallback copies of the text boxes with labels
+# or tags, so the replace phase changes them like the mc:Choice copies
+def markCopies(document, scanner):
+    for pr in fallbackParagraphs(document):
+        scanner.markCopy(pr, pr.text)
+    return 1
+
+
+# Function that returns the paragraphs the replace phase has to visit: the
+# ones recorded by the build phase, or all of them if the build phase did not
+# run on this document (e.g. the lists come from the project mode)
+def markedParagraphs(document, scanner):
+    if scanner.locations is None:
+        return iterParagraphs(document, fallback=True)
+    return scanner.locations
+
+
+def insertBibliography(document, scanner):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        insertBibliography                                                        #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Replaces the ^bibliography^ paragraphs with the reference list of the    #
+    #        cited entries, one paragraph per entry with the style of the marker.     #
+    ####################################################################################
+    """
+    markers = [pr for pr in markedParagraphs(document, scanner) if BIB_MARKER.search(pr.text)]
+    if not markers:
+        return 0
+    lines = bibliographyLines(scanner)
+    for pr in markers:
+        p = pr._p
+        for q in expandMarker(p, lines):
+            p.addnext(q)
+            p = q
+    log.log(PROCESS, "Process: Reference list of %d entries inserted.", len(lines))
+    return 1
+
+
+def crossReference(document, in_file, tmp_file, args):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        crossReference                                                            #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Cross-reference stage, builds the reference database and replaces the    #
+    #        labels and the tags. The stream engine reads in_file and writes the       #
+    #        post-processed document to tmp_file, the docx engine changes document.   #
+    ####################################################################################
+    """
+    v1 = args.silent
+    scanner = createScanner(args)
+    [fig, equ, sec1, sec2, sec3, sec4, tbl, cite] = scanner.lists
     if v1:
-        print("Details: Cross-reference database:")
-        print(fig)
-        print(sec1)
-        print(sec2)
-        print(sec3)
-        print(sec4)
-        print(tbl)
-        print(equ)
-        print(cite)
+        log.info("Details: Cross-reference database:")
+        for lst in scanner.lists:
+            log.info("%s", lst)
 
     ###############################################################
     # Build Reference database ####################################
     ###############################################################
-    print("Process: Start building the reference database.")
-    for pr in document.paragraphs:
-        fig.buildList(pr, v1, v2)
-        equ.buildList(pr, v1, v2)
-        sec1.buildList(pr, v1, v2)
-        sec2.buildList(pr, v1, v2)
-        sec3.buildList(pr, v1, v2)
-        sec4.buildList(pr, v1, v2)
-        tbl.buildList(pr, v1, v2)
-        cite.buildList(pr, v1, v2)
-
-        # If you have added new objects call the buildList function here
-    print("Process: Building of the reference database is completed.")
+    buildReferences(document, in_file, scanner, args)
     ###############################################################
 
     ###############################################################
     # Print List and other details ################################
     ###############################################################
     if v1:
-        print("\n\n\n###########################")
-        print("Details of the Database")
+        log.info("\n\n\n###########################\nDetails of the Database")
         fig.printList()
         sec1.printList()
         sec2.printList()
@@ -173,7 +315,7 @@ def __main__():
         equ.printList()
         cite.printList()
     if v1:
-        print("\n\n\n###########################")
+        log.info("\n\n\n###########################")
         fig.printIndexList()
         sec1.printIndexList()
         sec2.printIndexList()
@@ -181,35 +323,23 @@ def __main__():
         equ.printIndexList()
         cite.printIndexList()
     if v1:
-        print("\n\n\n###########################")
+        log.info("\n\n\n###########################")
         fig.printParentList()
         sec1.printParentList()
         sec2.printParentList()
         tbl.printParentList()
         equ.printParentList()
         cite.printParentList()
-        print("\n\n\n###########################")
+        log.info("\n\n\n###########################")
     if v1:
-        print("###########################\n\n\n")
+        log.info("###########################\n\n\n")
     # If you have added new objects call the print functions here
     ###############################################################
 
     ###############################################################
     # Search and Replace Labels ###################################
     ###############################################################
-    for i in range(2):
-        print("Process: Start searching the text for relevant lables.")
-        for pr in document.paragraphs:
-            fig.matchNreplace(pr, v1, v2)
-            sec1.matchNreplace(pr, v1, v2)
-            sec2.matchNreplace(pr, v1, v2)
-            sec3.matchNreplace(pr, v1, v2)
-            sec4.matchNreplace(pr, v1, v2)
-            tbl.matchNreplace(pr, v1, v2)
-            equ.matchNreplace(pr, v1, v2)
-            cite.matchNreplace(pr, v1, v2)
-    # If you have added new objects call the matchNreplace function here
-    print("Process: Search and replace of the labels in the text completed.")
+    replaceReferences(document, in_file, tmp_file, scanner, args)
     ###############################################################
 
     ###############################################################
@@ -226,7 +356,7 @@ def __main__():
     # If you have added new objects call the check function here
     ###############################################################
     if v1:
-        print("Process: Cleaning up work space and deleting database.")
+        log.log(PROCESS, "Process: Cleaning up work space and deleting database.")
     ###############################################################
     # Delete and clear all objects ################################
     ###############################################################
@@ -238,19 +368,214 @@ def __main__():
     del tbl
     del equ
     del cite
+    del scanner
     # If you have added new objects delete them here
     ###############################################################
-    print("Process: Saving post-processed temporary .docx document and .pdf file.")
-    word = comtypes.client.CreateObject('Word.Application')
-    # TODO Find how to use catch problem
-    document.save(tmp_file)
-    doc = word.Documents.Open(tmp_file)
-    doc.SaveAs(out_file, FileFormat=wdFormatPDF)
-    doc.Close()
-    word.Quit()
-    # os.remove(tmp_file)
+    return document
+
+
+def saveDocument(document, tmp_file):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        saveDocument                                                              #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Save stage, writes the post-processed .docx file. Nothing to do for the   #
+    #        stream engine (document is None), it has already written it.             #
+    ####################################################################################
+    """
+    log.log(PROCESS, "Process: Saving post-processed temporary .docx document.")
+    if not (document is None):
+        with stats.phase('save'):
+            document.save(tmp_file)
+    return 1
+
+
+def convertDocument(converter, tmp_file, out_file):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        convertDocument                                                           #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Convert stage, creates the .pdf file with the given pdfConverter.        #
+    ####################################################################################
+    """
+    if converter.name == 'none':
+        return 0
+    log.log(PROCESS, "Process: Converting to .pdf with %s.", converter.name)
+    start = time.perf_counter()
+    with stats.phase('convert'):
+        converter.convert(tmp_file, out_file)
+    log.log(PROCESS, "Process: Conversion to .pdf completed in %.2f s.", time.perf_counter() - start)
+    return 1
+
+
+###############################################################
+# Process one document ########################################
+###############################################################
+def checkFile(in_file, args):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        checkFile                                                                 #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Check mode (--check), finds the undeclared, duplicate and unused labels  #
+    #        of one document without changing it or writing any file. The document is #
+    #        always read with the streaming parser, whatever the --engine.            #
+    #                                                                                  #
+    # Return Arguments:                                                                #
+    #        report  : See labelChecker.check                                          #
+    ####################################################################################
+    """
+    from labelCheck import labelChecker
+    log.log(PROCESS, "Process: Checking the labels of %s.", in_file)
+    # The check mode writes no file, not even the cache of the bibliography
+    report = labelChecker(createScanner(args, save=False), args.silent, args.verbose).check(in_file)
+    log.log(PROCESS, "Process: Check completed, %d errors and %d warnings.", report['errors'], report['warnings'])
+    return report
+
+
+def processFile(in_file, out_file, tmp_file, args, converter=None):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        processFile                                                               #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Creates the references of one document and saves the .pdf file. Used by   #
+    #        the command line and by the batch mode (WordTeaBatch.py).                 #
+    #                                                                                  #
+    # Input Arguments:                                                                 #
+    #        in_file  : Path to the input .docx file                                   #
+    #        out_file : Path to the output .pdf file                                   #
+    #        tmp_file : Path to the post-processed .docx file, or None                 #
+    #        args     : The options, see addOptions                                    #
+    #        converter : The pdfConverter to be used, by default one is created from   #
+    #                    the options and closed at the end                             #
+    ####################################################################################
+    """
+    # Word converts from a file, if no temporary file is requested use one from the system
+    keep_tmp = not (tmp_file is None)
+    if not keep_tmp:
+        [fd, tmp_file] = tempfile.mkstemp(suffix='.docx')
+        os.close(fd)
+    own_converter = converter is None
+    if own_converter:
+        converter = getConverter(args.pdf, args.soffice)
+    try:
+        document = loadDocument(in_file, args)
+        document = crossReference(document, in_file, tmp_file, args)
+        saveDocument(document, tmp_file)
+        if converter.name == 'none' and not keep_tmp:
+            log.warning("!!!WARNING!!! No pdf backend and no temporary file, the post-processed document is not saved.")
+        convertDocument(converter, tmp_file, out_file)
+    finally:
+        if own_converter:
+            converter.close()
+        if not keep_tmp:
+            os.remove(tmp_file)
+    return 1
+
+
+class documentErrors:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        documentErrors                                                            #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Context manager of the processing of one document by the modes that      #
+    #        process many (batch, project, watch and the pipeline stages). An error    #
+    #        is caught and kept in message ("Type: text"), so the next documents are   #
+    #        still processed. KeyboardInterrupt is not caught.                         #
+    ####################################################################################
+    """
+
+    def __init__(self):
+        self.message = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, error, trace):
+        if kind is None or not issubclass(kind, Exception):
+            return False
+        self.message = kind.__name__ + ': ' + str(error)
+        return True
+
+
+def __main__():
+    ###########################################################
+    # Use parser to get the cmd arguments #####################
+    ###########################################################
+    parser = argparse.ArgumentParser(description='WordTea: Word document parser. Generates citations and cross-references from latex like text in word document files.')
+    parser.add_argument('inFile', help='Path to the input file.')
+    parser.add_argument('pdfFile', nargs='?', default=None, help='Path to the output pdf file. Not used with --check.')
+    parser.add_argument('tmpFile', nargs='?', default=None, help='Path to the output temporary file (the post-processed .docx). Optional, if omitted the .docx is only kept until the .pdf is created.')
+    parser.add_argument('--check', action='store_true', help='Only check the labels: prints a JSON report of the tags of undeclared labels, the labels declared twice and the labels that are not referenced, with the part and the paragraph of each. The document is not changed and no file is written. Exits with 1 if there are errors.')
+    parser.add_argument('--trace-memory', action='store_true', help='With --stats, also trace the peak memory of the Python allocations (tracemalloc). Makes the run a few times slower, the peak resident memory is always reported.')
+    addOptions(parser)
+
+    args = parser.parse_args()
+    if args.pdfFile is None and not args.check:
+        parser.error("the following arguments are required: pdfFile")
+    if args.check and not (args.cache is None):
+        parser.error("--cache can not be used with --check")
+    if args.trace_memory and args.stats is None:
+        parser.error("--trace-memory needs --stats")
+
+    ############################################################
+
+    #################################################
+    # Reading the arguments of the command to #######
+    # the variables used in the script        #######
+    #################################################
+    in_file = os.path.abspath(args.inFile)
+    checkOptions(args)
+    if args.check:
+        # The report is written to stdout, the messages to stderr
+        setupLogging(args.silent, args.verbose, args.log_file, stderr=True)
+        if not (args.stats is None):
+            collector = stats.start(args.trace_memory)
+            collector.info.update({'document': in_file, 'engine': 'check', 'status': 'ok'})
+        try:
+            report = checkFile(in_file, args)
+        finally:
+            if not (args.stats is None):
+                stats.stop().save(args.stats)
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write('\n')
+        return int(report['errors'] > 0)
+    out_file = os.path.abspath(args.pdfFile)
+    if args.tmpFile is None:
+        tmp_file = None
+    else:
+        tmp_file = os.path.abspath(args.tmpFile)
+    setupLogging(args.silent, args.verbose, args.log_file)
+
+    # Created before the processing, so a missing backend is found early
+    converter = getConverter(args.pdf, args.soffice)
+    if not (args.stats is None):
+        collector = stats.start(args.trace_memory)
+        collector.info.update({'document': in_file, 'engine': args.engine, 'pdf': converter.name, 'status': 'failed'})
+    try:
+        processFile(in_file, out_file, tmp_file, args, converter)
+        if not (args.stats is None):
+            collector.info['status'] = 'ok'
+    finally:
+        converter.close()
+        if not (args.stats is None):
+            stats.stop().save(args.stats)
+            log.log(PROCESS, "Process: Statistics written to %s.", args.stats)
 
 
 if __name__ == "__main__":
-    __main__()
-    print("Execution successfully completed!")
+    rtn = __main__()
+    # --check found errors
+    if rtn:
+        log.error("!!!ERROR!!! Check failed, see the report.")
+        sys.exit(1)
+    log.log(PROCESS, "Execution successfully completed!")
@@ -0,0 +1,274 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+# Batch mode of WordTea. Processes many documents with a pool of worker
+# processes, so the interpreter start-up and the imports are paid once per
+# worker and not once per document.
+
+import sys
+import argparse
+import os
+import io
+import csv
+import glob
+import time
+import contextlib
+import concurrent.futures
+import multiprocessing.util
+import WordTea
+from pdfConverter import getConverter
+from pipeline import documentPipeline
+from logSetup import log, setupLogging, PROCESS
+
+# The pdf converter of a worker process, created on its first document and
+# kept open for the next ones
+workerConverter = None
+
+
+###############################################################
+# Collect the documents to be processed #######################
+###############################################################
+def collectJobs(inputs, out_dir, keep_tmp):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        collectJobs                                                               #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Creates the list of (input .docx, output .pdf, temporary .docx) jobs.    #
+    #        Every input is a .docx file, a directory (all the .docx files in it), a  #
+    #        glob pattern or a manifest file. The outputs of the tool in a directory  #
+    #        or a glob pattern (.pdf and <name>_tmp.docx files) are skipped, see       #
+    #        isOutputFile. A manifest is a .csv file with the columns input .docx,    #
+    #        output .pdf and (optionally) temporary .docx, or a .txt file with one     #
+    #        input .docx per line. Relative paths of a manifest are relative to the    #
+    #        folder of the manifest.                                                   #
+    #                                                                                  #
+    # Input Arguments:                                                                 #
+    #        inputs   : List of directories, glob patterns and manifest files          #
+    #        out_dir  : Output folder, None to write next to the input files          #
+    #        keep_tmp : Keep the post-processed .docx files of the directories/globs   #
+    ####################################################################################
+    """
+    jobs = list()
+    for item in inputs:
+        ext = os.path.splitext(item)[1].lower()
+        if os.path.isfile(item) and ext == '.csv':
+            base = os.path.dirname(os.path.abspath(item))
+            with open(item, newline='') as f:
+                for row in csv.reader(f):
+                    row = [col.strip() for col in row if col.strip() != '']
+                    if len(row) == 0 or row[0].startswith('#'):
+                        continue
+                    in_file = os.path.join(base, row[0])
+                    if len(row) > 1:
+                        out_file = os.path.join(base, row[1])
+                    else:
+                        out_file = outputPath(in_file, out_dir, '.pdf')
+                    if len(row) > 2:
+                        tmp_file = os.path.join(base, row[2])
+                    else:
+                        tmp_file = None
+                    jobs.append((os.path.abspath(in_file), os.path.abspath(out_file), tmp_file and os.path.abspath(tmp_file)))
+            continue
+        if os.path.isfile(item) and ext == '.txt':
+            base = os.path.dirname(os.path.abspath(item))
+            with open(item) as f:
+                files = [os.path.join(base, line.strip()) for line in f if line.strip() != '' and not line.startswith('#')]
+        elif os.path.isdir(item):
+            files = [in_file for in_file in sorted(glob.glob(os.path.join(item, '*.docx'))) if not isOutputFile(in_file)]
+        elif os.path.isfile(item):
+            files = [item]
+        else:
+            files = [in_file for in_file in sorted(glob.glob(item)) if not isOutputFile(in_file)]
+        for in_file in files:
+            # Skip the lock files of Word
+            if os.path.basename(in_file).startswith('~$'):
+                continue
+            if keep_tmp:
+                tmp_file = outputPath(in_file, out_dir, '_tmp.docx')
+            else:
+                tmp_file = None
+            jobs.append((os.path.abspath(in_file), outputPath(in_file, out_dir, '.pdf'), tmp_file))
+    return jobs
+
+
+# Function that returns True for the files of a folder or a glob pattern that
+# are not input documents: everything but .docx, e.g. the .pdf files written
+# next to the inputs, and the post-processed <name>_tmp.docx files, that
+# would be processed again (and again) by the watch mode
+def isOutputFile(path):
+    name = os.path.basename(path).lower()
+    return not name.endswith('.docx') or name.endswith('_tmp.docx')
+
+
+# Function that returns the path of an output file of a document
+def outputPath(in_file, out_dir, suffix):
+    if out_dir is None:
+        out_dir = os.path.dirname(os.path.abspath(in_file))
+    name = os.path.splitext(os.path.basename(in_file))[0]
+    return os.path.abspath(os.path.join(out_dir, name + suffix))
+
+
+###############################################################
+# Process one document in a worker ############################
+###############################################################
+# Function that returns the pdf converter of the worker process
+def getWorkerConverter(args):
+    global workerConverter
+    if workerConverter is None:
+        workerConverter = getConverter(args.pdf, args.soffice)
+        # Close it when the worker process exits
+        multiprocessing.util.Finalize(None, workerConverter.close, exitpriority=10)
+    return workerConverter
+
+
+def runJob(job, args):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        runJob                                                                    #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Processes one document, runs in the worker processes. Errors are caught   #
+    #        and returned, so one failing document does not stop the others.          #
+    #                                                                                  #
+    # Return Arguments:                                                                #
+    #        [status, time, message] : status is 'ok' or 'failed', time in seconds     #
+    ####################################################################################
+    """
+    [in_file, out_file, tmp_file] = job
+    start = time.perf_counter()
+    # The prints of the workers would be mixed, they are only shown with --verbose
+    if args.verbose:
+        output = contextlib.nullcontext()
+    else:
+        output = contextlib.redirect_stdout(io.StringIO())
+    with WordTea.documentErrors() as failure:
+        with output:
+            # Workers that are not forked from the main process start without a handler
+            if not log.handlers:
+                setupLogging(args.silent, args.verbose, args.log_file)
+            WordTea.processFile(in_file, out_file, tmp_file, args, getWorkerConverter(args))
+    if failure.message is None:
+        return ['ok', time.perf_counter() - start, '']
+    return ['failed', time.perf_counter() - start, failure.message]
+
+
+def __main__():
+    ###########################################################
+    # Use parser to get the cmd arguments #####################
+    ###########################################################
+    parser = argparse.ArgumentParser(description='WordTea batch mode: processes many word documents in parallel.')
+    parser.add_argument('inputs', nargs='+', help='Directories, glob patterns (e.g. "reports/*.docx") or manifest files (.csv with input, pdf and temporary file columns, or .txt with one input per line).')
+    parser.add_argument('-o', metavar='out_dir', default=None, help='Output folder of the .pdf (and temporary .docx) files of the directories and glob patterns. Default: next to the input files.')
+    parser.add_argument('-j', metavar='jobs', type=int, default=os.cpu_count(), help='Number of worker processes, default the number of CPUs.')
+    parser.add_argument('--keep-tmp', action='store_true', help='Keep the post-processed .docx files (<name>_tmp.docx) of the directories and glob patterns.')
+    parser.add_argument('--pipeline', action='store_true', help='Run the stages (load, cross-reference, save, convert) as a pipeline of threads instead of the process pool, so the pdf conversion of a document overlaps with the processing of the next ones. A report of the throughput of every stage is printed at the end.')
+    parser.add_argument('--converters', metavar='converters', type=int, default=1, help='Number of pdf converters of the pipeline, default 1.')
+    parser.add_argument('--queue', metavar='depth', type=int, default=2, help='Number of documents that can wait between two stages of the pipeline, default 2.')
+    parser.add_argument('--summary', metavar='summary', default=None, help='Write the status and the time of every document to a .csv file.')
+    WordTea.addOptions(parser)
+    args = parser.parse_args()
+    WordTea.checkOptions(args)
+    if not (args.stats is None):
+        parser.error("--stats is for single documents, use --summary for the times of the batch")
+    setupLogging(args.silent, args.verbose, args.log_file)
+    if args.j < 1:
+        parser.error("-j argument must be at least 1")
+    if args.converters < 1 or args.queue < 1:
+        parser.error("--converters and --queue arguments must be at least 1")
+    # Find a missing pdf backend before starting the workers
+    getConverter(args.pdf, args.soffice).close()
+
+    jobs = collectJobs(args.inputs, args.o, args.keep_tmp)
+    if len(jobs) == 0:
+        log.log(PROCESS, "Process: No documents found.")
+        return 1
+    if not (args.o is None):
+        os.makedirs(args.o, exist_ok=True)
+
+    ###########################################################
+    # Run the jobs in the pipeline or in the process pool #####
+    ###########################################################
+    results = dict()
+    start = time.perf_counter()
+    if args.pipeline:
+        log.log(PROCESS, "Process: Processing %d documents with a pipeline of %d converters.", len(jobs), args.converters)
+        pipe = documentPipeline(args, args.converters, args.queue)
+        # The prints of the stages would be mixed, they are only shown with --verbose
+        if args.verbose:
+            output = contextlib.nullcontext()
+        else:
+            output = contextlib.redirect_stdout(io.StringIO())
+        with output:
+            items = pipe.run(jobs)
+        for job, item in zip(jobs, items):
+            results[job] = [item.status, sum(item.times.values()), item.message]
+    else:
+        log.log(PROCESS, "Process: Processing %d documents with %d workers.", len(jobs), args.j)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.j) as pool:
+            futures = dict()
+            for job in jobs:
+                futures[pool.submit(runJob, job, args)] = job
+            for future in concurrent.futures.as_completed(futures):
+                job = futures[future]
+                try:
+                    results[job] = future.result()
+                # A worker that dies takes its document with it, not the batch
+                except Exception as e:
+                    results[job] = ['failed', 0.0, type(e).__name__ + ': ' + str(e)]
+                log.log(PROCESS, "Process: %s %s", results[job][0], job[0])
+    total = time.perf_counter() - start
+
+    ###########################################################
+    # Print and save the summary ##############################
+    ###########################################################
+    failed = 0
+    print("\n%-8s %10s  %s" % ("Status", "Time (s)", "Document"))
+    for job in jobs:
+        [status, duration, message] = results[job]
+        line = "%-8s %10.2f  %s" % (status, duration, job[0])
+        if status != 'ok':
+            failed += 1
+            line += "\n\t" + message
+        print(line)
+    print("\nDocuments: " + str(len(jobs)) + ", failed: " + str(failed) + ", total time: %.2f s" % total)
+    if args.pipeline:
+        print("\n" + pipe.stageReport())
+    if not (args.summary is None):
+        with open(args.summary, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['document', 'pdf', 'status', 'time', 'message'])
+            for job in jobs:
+                [status, duration, message] = results[job]
+                writer.writerow([job[0], job[1], status, "%.3f" % duration, message])
+    return failed
+
+
+if __name__ == "__main__":
+    if __main__():
+        sys.exit(1)
@@ -0,0 +1,276 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+# Project mode of WordTea. A book that is split in chapter documents is
+# processed as one document: the labels of all the chapters are numbered
+# together and a chapter can reference the labels of the other chapters.
+#   1. The labels of every chapter are collected in parallel (worker processes).
+#   2. The labels are added to one set of reference lists, in the order of the
+#      chapters, which gives the global numbering.
+#   3. The reference lists are sent to the workers (read-only) and the tags of
+#      every chapter are replaced in parallel, then the .pdf files are created.
+
+import sys
+import argparse
+import os
+import io
+import csv
+import time
+import tempfile
+import logging
+import contextlib
+import concurrent.futures
+import WordTea
+from WordTeaBatch import collectJobs, getWorkerConverter
+from storyIterator import iterParagraphs, runText
+from pdfConverter import getConverter
+from logSetup import log, setupLogging, PROCESS
+
+
+class declarationCollector:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        declarationCollector                                                      #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Collects the hits of a chapter that declare a label (the labels, and the #
+    #        citations of a bibliography), in order, without numbering them. Has the  #
+    #        addParagraph and finish functions of the labelCache, so it can be given  #
+    #        to the stream engine as well.                                             #
+    ####################################################################################
+    """
+
+    def __init__(self, scanner):
+        self.scanner = scanner
+        self.declarations = list()
+
+    def addParagraph(self, text):
+        hits = self.scanner.scan(text)
+        for [symbol, kind, label, start, end] in hits:
+            if symbol == '^' or kind in self.scanner.bibliographies:
+                self.declarations.append((symbol, kind, label))
+        return hits
+
+    def finish(self):
+        return 1
+
+
+# Function that sets up the logging of a worker and returns the context that
+# captures its output. Without --verbose only the warnings are kept, they are
+# printed by the main process under the name of the chapter.
+def workerOutput(args, buffer):
+    # Workers that are not forked from the main process start without a handler
+    if not log.handlers:
+        setupLogging(args.silent, args.verbose, args.log_file)
+    if args.verbose or not (args.log_file is None):
+        return contextlib.nullcontext()
+    log.setLevel(logging.WARNING)
+    return contextlib.redirect_stdout(buffer)
+
+
+###############################################################
+# Phase 1: collect the labels of a chapter ####################
+###############################################################
+def scanChapter(in_file, args):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        scanChapter                                                               #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Runs in the worker processes, returns the declarations of one chapter    #
+    #        as a list of (symbol, kind, label) in the order of the document.         #
+    ####################################################################################
+    """
+    buffer = io.StringIO()
+    with workerOutput(args, buffer):
+        collector = declarationCollector(WordTea.createScanner(args))
+        if args.engine == 'stream':
+            # Imports lxml, only loaded when the stream engine is used
+            from streamEngine import streamEngine
+            streamEngine(collector.scanner, args.silent, args.verbose).buildList(in_file, collector)
+        else:
+            for pr in iterParagraphs(WordTea.loadDocument(in_file, args)):
+                # The text the docx engine scans, see labelScanner.buildList
+                collector.addParagraph(runText(pr))
+    return [collector.declarations, buffer.getvalue()]
+
+
+###############################################################
+# Phase 2: replace the tags of a chapter ######################
+###############################################################
+def replaceChapter(job, args, states):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        replaceChapter                                                            #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Runs in the worker processes. Restores the merged reference lists,       #
+    #        removes the labels and replaces the tags of one chapter, saves it and    #
+    #        creates its .pdf file. Errors are caught and returned.                   #
+    #                                                                                  #
+    # Input Arguments:                                                                 #
+    #        job     : (input .docx, output .pdf, temporary .docx or None)             #
+    #        args    : The options                                                     #
+    #        states  : Kind -> state of the merged list, see referenceList.getState    #
+    #                                                                                  #
+    # Return Arguments:                                                                #
+    #        [status, time, message, output]                                           #
+    ####################################################################################
+    """
+    [in_file, out_file, tmp_file] = job
+    start = time.perf_counter()
+    buffer = io.StringIO()
+    keep_tmp = not (tmp_file is None)
+    try:
+        with WordTea.documentErrors() as failure, workerOutput(args, buffer):
+            # Word converts from a file, if no temporary file is requested use one from the system
+            if not keep_tmp:
+                [fd, tmp_file] = tempfile.mkstemp(suffix='.docx')
+                os.close(fd)
+            scanner = WordTea.createScanner(args)
+            for kind, lst in scanner.kinds.items():
+                lst.setState(states[kind], len(states[kind]['labels']))
+            scanner.buildTables(False)
+            converter = getWorkerConverter(args)
+            document = WordTea.loadDocument(in_file, args)
+            WordTea.replaceReferences(document, in_file, tmp_file, scanner, args)
+            WordTea.saveDocument(document, tmp_file)
+            WordTea.convertDocument(converter, tmp_file, out_file)
+    finally:
+        if not keep_tmp and not (tmp_file is None) and os.path.isfile(tmp_file):
+            os.remove(tmp_file)
+    if failure.message is None:
+        return ['ok', time.perf_counter() - start, '', buffer.getvalue()]
+    return ['failed', time.perf_counter() - start, failure.message, buffer.getvalue()]
+
+
+def __main__():
+    ###########################################################
+    # Use parser to get the cmd arguments #####################
+    ###########################################################
+    parser = argparse.ArgumentParser(description='WordTea project mode: processes the chapters of a book as one document, with one numbering and references between the chapters.')
+    parser.add_argument('chapters', nargs='+', help='The chapter .docx files in the order of the book, or a .txt manifest with one chapter per line (or a .csv manifest, see WordTeaBatch.py). Glob patterns are sorted by name.')
+    parser.add_argument('-o', metavar='out_dir', default=None, help='Output folder of the .pdf (and temporary .docx) files. Default: next to the chapters.')
+    parser.add_argument('-j', metavar='jobs', type=int, default=os.cpu_count(), help='Number of worker processes, default the number of CPUs.')
+    parser.add_argument('--summary', metavar='summary', default=None, help='Write the status and the time of every chapter to a .csv file.')
+    parser.add_argument('--keep-tmp', action='store_true', help='Keep the post-processed .docx files (<name>_tmp.docx) of the chapters.')
+    WordTea.addOptions(parser)
+    args = parser.parse_args()
+    WordTea.checkOptions(args)
+    if not (args.stats is None) or not (args.cache is None):
+        parser.error("--stats and --cache are for single documents, use --summary for the times of the chapters")
+    if args.j < 1:
+        parser.error("-j argument must be at least 1")
+    setupLogging(args.silent, args.verbose, args.log_file)
+    # Find a missing pdf backend before starting the workers
+    getConverter(args.pdf, args.soffice).close()
+
+    jobs = collectJobs(args.chapters, args.o, args.keep_tmp)
+    if len(jobs) == 0:
+        log.log(PROCESS, "Process: No chapters found.")
+        return 1
+    if not (args.o is None):
+        os.makedirs(args.o, exist_ok=True)
+
+    start = time.perf_counter()
+    results = dict()
+    workers = min(args.j, len(jobs))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        ###########################################################
+        # Phase 1: collect the labels of all the chapters #########
+        ###########################################################
+        log.log(PROCESS, "Process: Collecting the labels of %d chapters with %d workers.", len(jobs), workers)
+        futures = [pool.submit(scanChapter, job[0], args) for job in jobs]
+        declarations = list()
+        for job, future in zip(jobs, futures):
+            try:
+                [found, output] = future.result()
+            except Exception as e:
+                log.error("!!!ERROR!!! Labels of %s could not be read: %s: %s", job[0], type(e).__name__, e)
+                return 1
+            if output:
+                log.warning("%s:\n%s", job[0], output.rstrip())
+            declarations.append(found)
+
+        ###########################################################
+        # Merge the labels in the order of the chapters ###########
+        ###########################################################
+        scanner = WordTea.createScanner(args)
+        for job, found in zip(jobs, declarations):
+            log.info("Info: %d declarations in %s.", len(found), job[0])
+            for [symbol, kind, label] in found:
+                scanner.declare(symbol, kind, label, args.silent, args.verbose)
+        scanner.buildTables(args.verbose)
+        states = dict((kind, lst.getState()) for kind, lst in scanner.kinds.items())
+        log.log(PROCESS, "Process: Merged database of %d labels built in %.2f s.", sum(lst.counter for lst in scanner.lists), time.perf_counter() - start)
+
+        ###########################################################
+        # Phase 2: replace the tags of all the chapters ###########
+        ###########################################################
+        futures = dict()
+        for job in jobs:
+            futures[pool.submit(replaceChapter, job, args, states)] = job
+        for future in concurrent.futures.as_completed(futures):
+            job = futures[future]
+            try:
+                results[job] = future.result()
+            # A worker that dies takes its chapter with it, not the project
+            except Exception as e:
+                results[job] = ['failed', 0.0, type(e).__name__ + ': ' + str(e), '']
+            if results[job][3]:
+                log.warning("%s:\n%s", job[0], results[job][3].rstrip())
+            log.log(PROCESS, "Process: %s %s", results[job][0], job[0])
+    total = time.perf_counter() - start
+
+    ###########################################################
+    # Print and save the summary ##############################
+    ###########################################################
+    failed = 0
+    print("\n%-8s %10s  %s" % ("Status", "Time (s)", "Chapter"))
+    for job in jobs:
+        [status, duration, message, output] = results[job]
+        line = "%-8s %10.2f  %s" % (status, duration, job[0])
+        if status != 'ok':
+            failed += 1
+            line += "\n\t" + message
+        print(line)
+    print("\nChapters: " + str(len(jobs)) + ", failed: " + str(failed) + ", total time: %.2f s" % total)
+    if not (args.summary is None):
+        with open(args.summary, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['chapter', 'pdf', 'status', 'time', 'message'])
+            for job in jobs:
+                [status, duration, message, output] = results[job]
+                writer.writerow([job[0], job[1], status, "%.3f" % duration, message])
+    return failed
+
+
+if __name__ == "__main__":
+    if __main__():
+        sys.exit(1)
@@ -0,0 +1,412 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+# Server mode of WordTea. A local HTTP server that accepts .docx uploads, puts
+# them in a bounded queue and processes them on a fixed pool of worker
+# processes. The workers are started once, with the imports, the compiled
+# patterns, the bibliography and the pdf converter ready, so a job only pays
+# for the processing of its document. When the queue is full new uploads get
+# 503, so the clients back off instead of the server running out of memory.
+#
+#   POST /jobs[?format=pdf&wait=1&s1=2...] : the body is the .docx file. Returns
+#                                            the job id (202), or the result
+#                                            with wait=1
+#   GET  /jobs/<id>                        : status and times of a job
+#   GET  /jobs/<id>/result                 : the processed .docx or .pdf file
+#   GET  /metrics                          : counters, queue and latencies
+
+import sys
+import argparse
+import os
+import io
+import json
+import time
+import uuid
+import logging
+import tempfile
+import threading
+import collections
+import concurrent.futures
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import WordTea
+import wordTeaApi
+from WordTeaBatch import getWorkerConverter
+from pdfConverter import getConverter
+from logSetup import log, setupLogging, PROCESS
+
+# Options that can be changed for one job with the query of the upload
+JOB_OPTIONS = ['s1', 's2', 's3', 'table']
+# Content type of the results
+CONTENT_TYPES = {'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+                 'pdf': 'application/pdf'}
+
+
+###############################################################
+# Worker processes ############################################
+###############################################################
+def startWorker(args):
+    # The warnings are returned with the result of the job, the log of the
+    # workers would only mix with the one of the server
+    for handler in list(log.handlers):
+        log.removeHandler(handler)
+    log.addHandler(logging.NullHandler())
+    log.propagate = False
+    # Loading the bibliography and starting the converter here makes the
+    # workers warm before the first job
+    if not (args.r is None):
+        WordTea.loadBibliography(args.r)
+    getWorkerConverter(args)
+
+
+def renderJob(data, fmt, overrides, args):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        renderJob                                                                 #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Runs in the worker processes. Processes the uploaded .docx in memory and  #
+    #        returns the processed .docx, or the .pdf created from it.                 #
+    #                                                                                  #
+    # Input Arguments:                                                                 #
+    #        data      : Bytes of the uploaded .docx file                              #
+    #        fmt       : 'docx' or 'pdf'                                               #
+    #        overrides : Options of the job, see JOB_OPTIONS                           #
+    #        args      : The options of the server                                     #
+    #                                                                                  #
+    # Return Arguments:                                                                #
+    #        [output, result, started, finished] : The bytes of the file, the         #
+    #                   processResult as a dictionary and the times (time.time())     #
+    ####################################################################################
+    """
+    started = time.time()
+    kwargs = dict((name, getattr(args, name)) for name in JOB_OPTIONS)
+    kwargs.update(overrides)
+    [document, result] = wordTeaApi.process(data, bib=args.r, silent=args.silent, verbose=args.verbose, **kwargs)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    output = buffer.getvalue()
+    if fmt == 'pdf':
+        tmp_dir = tempfile.mkdtemp()
+        tmp_file = os.path.join(tmp_dir, 'job.docx')
+        out_file = os.path.join(tmp_dir, 'job.pdf')
+        try:
+            with open(tmp_file, 'wb') as f:
+                f.write(output)
+            getWorkerConverter(args).convert(tmp_file, out_file)
+            with open(out_file, 'rb') as f:
+                output = f.read()
+        finally:
+            for path in [tmp_file, out_file]:
+                if os.path.isfile(path):
+                    os.remove(path)
+            os.rmdir(tmp_dir)
+    return [output, result.toDict(), started, time.time()]
+
+
+class renderJobInfo:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        renderJobInfo                                                             #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        One upload: its status (queued, running, ok, failed), its times and,     #
+    #        when it is finished, the output file and the result of the processing.   #
+    ####################################################################################
+    """
+
+    def __init__(self, fmt):
+        self.id = uuid.uuid4().hex
+        self.format = fmt
+        self.status = 'queued'
+        self.received = time.time()
+        self.started = None
+        self.finished = None
+        self.output = None
+        self.result = None
+        self.message = ''
+        self.done = threading.Event()
+
+    # Returns the status of the job as a dictionary, ready for json.dump
+    def toDict(self):
+        rtn = {'id': self.id, 'status': self.status, 'format': self.format, 'received': self.received}
+        if self.finished is not None:
+            rtn['queue_time'] = round(self.started - self.received, 6)
+            rtn['process_time'] = round(self.finished - self.started, 6)
+            rtn['latency'] = round(self.finished - self.received, 6)
+        if self.status == 'failed':
+            rtn['error'] = self.message
+        if self.result is not None:
+            rtn['warnings'] = self.result['warnings']
+            rtn['unresolved'] = self.result['unresolved']
+            rtn['timings'] = self.result['timings']
+        return rtn
+
+
+class renderService:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        renderService                                                             #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        The job queue and the worker pool of the server. At most workers + queue  #
+    #        jobs are accepted at a time (running or waiting), submit returns None     #
+    #        above that. The last finished jobs are kept for their results.           #
+    ####################################################################################
+    """
+
+    ################################################################################################
+    # Begin : Constructor                                                                          #
+    ################################################################################################
+    def __init__(self, args):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        renderService constractor                                                 #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        args    : The options, see __main__ and WordTea.addOptions                #
+        ####################################################################################
+        """
+        self.args = args
+        self.limit = args.j + args.queue
+        self.lock = threading.Lock()
+        # Job id -> renderJobInfo, in the order they were received
+        self.jobs = collections.OrderedDict()
+        self.pending = 0
+        self.counters = {'accepted': 0, 'rejected': 0, 'ok': 0, 'failed': 0}
+        # Latencies of the last finished jobs, for the percentiles of /metrics
+        self.latencies = collections.deque(maxlen=1000)
+        self.started = time.time()
+        self.pool = concurrent.futures.ProcessPoolExecutor(max_workers=args.j, initializer=startWorker, initargs=(args,))
+        # Start all the workers now, not at the first uploads
+        for future in [self.pool.submit(time.sleep, 0.1) for i in range(args.j)]:
+            future.result()
+################################################################################################
+# End : Constructor                                                                            #
+################################################################################################
+
+################################################################################################
+# Begin : Job functions                                                                        #
+################################################################################################
+
+    def submit(self, data, fmt, overrides):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        submit                                                                    #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Queues a job. Returns its renderJobInfo, or None if the queue is full.   #
+        ####################################################################################
+        """
+        with self.lock:
+            if self.pending >= self.limit:
+                self.counters['rejected'] += 1
+                return None
+            self.pending += 1
+            self.counters['accepted'] += 1
+            job = renderJobInfo(fmt)
+            self.jobs[job.id] = job
+            self.evict()
+        future = self.pool.submit(renderJob, data, fmt, overrides, self.args)
+        future.add_done_callback(lambda f: self.finish(job, f))
+        return job
+
+    # Called when the worker has finished a job (in a thread of the pool)
+    def finish(self, job, future):
+        try:
+            [job.output, job.result, job.started, job.finished] = future.result()
+            job.status = 'ok'
+        except BaseException as e:
+            job.started = job.started or job.received
+            job.finished = time.time()
+            job.status = 'failed'
+            job.message = type(e).__name__ + ': ' + str(e)
+        with self.lock:
+            self.pending -= 1
+            self.counters[job.status] += 1
+            self.latencies.append(job.finished - job.received)
+        job.done.set()
+        log.log(PROCESS, "Process: Job %s %s in %.3f s.", job.id, job.status, job.finished - job.received)
+
+    # Removes the oldest finished jobs above --keep, called with the lock
+    def evict(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done.is_set()]
+        for job_id in finished[:max(0, len(finished) - self.args.keep)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    # Returns the counters, the queue and the latency percentiles
+    def metrics(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            rtn = dict(self.counters)
+            rtn.update({'workers': self.args.j, 'pending': self.pending, 'limit': self.limit,
+                        'uptime': round(time.time() - self.started, 3)})
+        if latencies:
+            for name, q in [('p50', 0.5), ('p90', 0.9), ('p99', 0.99)]:
+                rtn['latency_' + name] = round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 6)
+            rtn['latency_max'] = round(latencies[-1], 6)
+        return rtn
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+################################################################################################
+# End : Job functions                                                                          #
+################################################################################################
+
+
+class requestHandler(BaseHTTPRequestHandler):
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        requestHandler                                                            #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        The HTTP requests of the server, see the description of the module. The  #
+    #        renderService is self.server.service.                                     #
+    ####################################################################################
+    """
+
+    def do_POST(self):
+        url = urllib.parse.urlparse(self.path)
+        if url.path.rstrip('/') != '/jobs':
+            return self.sendJson(404, {'error': 'Not found'})
+        query = dict(urllib.parse.parse_qsl(url.query))
+        fmt = query.get('format', 'docx')
+        if fmt not in CONTENT_TYPES:
+            return self.sendJson(400, {'error': 'format must be docx or pdf'})
+        if fmt == 'pdf' and self.server.service.args.pdf == 'none':
+            return self.sendJson(400, {'error': 'The server has no pdf backend'})
+        overrides = dict()
+        for name in JOB_OPTIONS:
+            if name in query:
+                if query[name] not in ['1', '2', '3', '4']:
+                    return self.sendJson(400, {'error': name + ' must be between 1 and 4'})
+                overrides[name] = int(query[name])
+        size = int(self.headers.get('Content-Length') or 0)
+        if size <= 0:
+            return self.sendJson(411, {'error': 'The body must be the .docx file, with its Content-Length'})
+        if size > self.server.service.args.max_size * 1024 * 1024:
+            return self.sendJson(413, {'error': 'The document is larger than the limit of the server'})
+        data = self.rfile.read(size)
+        job = self.server.service.submit(data, fmt, overrides)
+        if job is None:
+            return self.sendJson(503, {'error': 'The queue is full, try again later'}, {'Retry-After': '1'})
+        if query.get('wait', '0') in ['0', 'false', '']:
+            return self.sendJson(202, job.toDict(), {'Location': '/jobs/' + job.id})
+        job.done.wait()
+        return self.sendResult(job)
+
+    def do_GET(self):
+        parts = [part for part in urllib.parse.urlparse(self.path).path.split('/') if part]
+        if parts == ['metrics']:
+            return self.sendJson(200, self.server.service.metrics())
+        if len(parts) in [2, 3] and parts[0] == 'jobs':
+            job = self.server.service.get(parts[1])
+            if job is None:
+                return self.sendJson(404, {'error': 'Unknown job ' + parts[1]})
+            if len(parts) == 2:
+                return self.sendJson(200, job.toDict())
+            if parts[2] == 'result':
+                if not job.done.is_set():
+                    return self.sendJson(409, job.toDict())
+                return self.sendResult(job)
+        return self.sendJson(404, {'error': 'Not found'})
+
+    # Sends the output file of a finished job, or its error
+    def sendResult(self, job):
+        if job.status != 'ok':
+            return self.sendJson(500, job.toDict())
+        headers = {'X-WordTea-Job': job.id, 'X-WordTea-Latency': '%.6f' % (job.finished - job.received)}
+        return self.send(200, job.output, CONTENT_TYPES[job.format], headers)
+
+    def sendJson(self, code, data, headers=None):
+        return self.send(code, json.dumps(data, ensure_ascii=False).encode('utf-8'), 'application/json', headers)
+
+    def send(self, code, body, content_type, headers=None):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or dict()).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        return 1
+
+    # The requests are logged at info level, not to stderr
+    def log_message(self, format, *args):
+        log.info("Info: %s %s", self.address_string(), format % args)
+
+
+def __main__():
+    ###########################################################
+    # Use parser to get the cmd arguments #####################
+    ###########################################################
+    parser = argparse.ArgumentParser(description='WordTea server mode: a local HTTP server that processes uploaded .docx files on a pool of worker processes.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on, default 127.0.0.1 (local only).')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on, default 8080.')
+    parser.add_argument('-j', metavar='jobs', type=int, default=os.cpu_count(), help='Number of worker processes, default the number of CPUs.')
+    parser.add_argument('--queue', metavar='queue', type=int, default=16, help='Number of jobs that can wait for a worker, the uploads above it get 503. Default 16.')
+    parser.add_argument('--keep', metavar='keep', type=int, default=100, help='Number of finished jobs kept for their results, default 100.')
+    parser.add_argument('--max-size', metavar='MB', type=float, default=50, help='Largest upload in MB, default 50.')
+    WordTea.addOptions(parser)
+    args = parser.parse_args()
+    WordTea.checkOptions(args)
+    if not (args.stats is None) or not (args.cache is None):
+        parser.error("--stats and --cache are for single documents, use /metrics for the times of the server")
+    if args.j < 1 or args.queue < 0 or args.keep < 0:
+        parser.error("-j must be at least 1, --queue and --keep at least 0")
+    setupLogging(args.silent, args.verbose, args.log_file)
+    # Find a missing pdf backend before starting the workers
+    getConverter(args.pdf, args.soffice).close()
+
+    service = renderService(args)
+    server = ThreadingHTTPServer((args.host, args.port), requestHandler)
+    server.daemon_threads = True
+    server.service = service
+    log.log(PROCESS, "Process: Serving on http://%s:%d with %d workers and a queue of %d jobs.", args.host, server.server_address[1], args.j, args.queue)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log.log(PROCESS, "Process: Server stopped.")
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    if __main__():
+        sys.exit(1)
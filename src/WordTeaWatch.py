@@ -0,0 +1,241 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+# Watch mode of WordTea. Keeps running and processes the documents again every
+# time they are saved. The interpreter, the imports, the compiled patterns and
+# the pdf converter (e.g. the Word instance) stay alive between the runs.
+
+import sys
+import argparse
+import os
+import time
+import WordTea
+from WordTeaBatch import collectJobs
+from pdfConverter import getConverter
+from logSetup import log, setupLogging, PROCESS
+
+
+# Function that returns the modification time and the size of a file, or None
+# if the file does not exist (e.g. while Word replaces it)
+def fileState(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class documentWatcher:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        documentWatcher                                                           #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Polls the input documents and processes the ones that changed. A         #
+    #        document is processed once it has not changed for the debounce time, so  #
+    #        the many writes of one save (and saves in a quick row) give one run.      #
+    ####################################################################################
+    """
+
+    ################################################################################################
+    # Begin : Constructor                                                                          #
+    ################################################################################################
+    def __init__(self, args):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        documentWatcher constractor                                               #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        args    : The options, see __main__ and WordTea.addOptions                #
+        ####################################################################################
+        """
+        self.args = args
+        self.converter = None
+        # Input .docx -> state when it was last processed
+        self.done = dict()
+        # Input .docx -> [state, time the state was first seen] of the changes
+        self.pending = dict()
+        self.runs = 0
+        self.failed = 0
+################################################################################################
+# End : Constructor                                                                            #
+################################################################################################
+
+################################################################################################
+# Begin : Poll function                                                                        #
+################################################################################################
+
+    def poll(self):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        poll                                                                      #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Checks all the inputs once and processes the documents whose changes     #
+        #        are older than the debounce time. The inputs are collected again on      #
+        #        every poll, so new documents of a watched folder are found as well.      #
+        ####################################################################################
+        """
+        now = time.monotonic()
+        for job in collectJobs(self.args.inputs, self.args.o, self.args.keep_tmp):
+            in_file = job[0]
+            state = fileState(in_file)
+            if state is None or self.done.get(in_file) == state:
+                self.pending.pop(in_file, None)
+                continue
+            if in_file not in self.done and not self.args.initial and self.isUpToDate(job):
+                self.done[in_file] = state
+                continue
+            # Restart the debounce time on every new change
+            if in_file not in self.pending or self.pending[in_file][0] != state:
+                self.pending[in_file] = [state, now]
+                continue
+            if now - self.pending[in_file][1] >= self.args.debounce:
+                del self.pending[in_file]
+                self.process(job, state)
+        return 1
+
+    # A document is up to date when its .pdf is newer, used on the first poll
+    def isUpToDate(self, job):
+        pdf = fileState(job[1])
+        return not (pdf is None) and pdf[0] >= fileState(job[0])[0]
+
+################################################################################################
+# End : Poll function                                                                          #
+################################################################################################
+
+################################################################################################
+# Begin : Process function                                                                     #
+################################################################################################
+
+    def process(self, job, state):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        process                                                                   #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Processes one document with the converter of the watcher. A failed run  #
+        #        is reported and the document is tried again on its next change. The     #
+        #        converter is created again after a failure, in case it was the one that  #
+        #        failed (e.g. Word was closed by the user).                                #
+        ####################################################################################
+        """
+        [in_file, out_file, tmp_file] = job
+        log.log(PROCESS, "Process: Change in %s, processing.", in_file)
+        start = time.perf_counter()
+        self.runs += 1
+        with WordTea.documentErrors() as failure:
+            if self.converter is None:
+                self.converter = getConverter(self.args.pdf, self.args.soffice)
+            WordTea.processFile(in_file, out_file, tmp_file, self.args, self.converter)
+            log.log(PROCESS, "Process: Done %s in %.2f s.", out_file, time.perf_counter() - start)
+        if not (failure.message is None):
+            self.failed += 1
+            log.error("!!!ERROR!!! Processing of %s failed: %s", in_file, failure.message)
+            self.close()
+        # A failed document is not processed again until it changes
+        self.done[in_file] = state
+        return 1
+
+    def close(self):
+        if not (self.converter is None):
+            try:
+                self.converter.close()
+            except Exception:
+                pass
+            self.converter = None
+
+################################################################################################
+# End : Process function                                                                       #
+################################################################################################
+
+################################################################################################
+# Begin : Run function                                                                         #
+################################################################################################
+
+    def run(self):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        run                                                                       #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Polls the inputs until Ctrl+C is pressed.                                 #
+        ####################################################################################
+        """
+        log.log(PROCESS, "Process: Watching %s, press Ctrl+C to stop.", ", ".join(self.args.inputs))
+        try:
+            while True:
+                self.poll()
+                time.sleep(self.args.interval)
+        except KeyboardInterrupt:
+            log.log(PROCESS, "\nProcess: Watch stopped after %d runs, %d failed.", self.runs, self.failed)
+        finally:
+            self.close()
+        return 1
+
+################################################################################################
+# End : Run function                                                                           #
+################################################################################################
+
+
+def __main__():
+    ###########################################################
+    # Use parser to get the cmd arguments #####################
+    ###########################################################
+    parser = argparse.ArgumentParser(description='WordTea watch mode: processes word documents again every time they are saved.')
+    parser.add_argument('inputs', nargs='+', help='Input .docx files, directories, glob patterns (e.g. "chapters/*.docx") or manifest files, see WordTeaBatch.py.')
+    parser.add_argument('-o', metavar='out_dir', default=None, help='Output folder of the .pdf (and temporary .docx) files of the directories and glob patterns. Default: next to the input files.')
+    parser.add_argument('--keep-tmp', action='store_true', help='Keep the post-processed .docx files (<name>_tmp.docx) of the directories and glob patterns.')
+    parser.add_argument('--interval', metavar='seconds', type=float, default=0.5, help='Time between two checks of the inputs, default 0.5 s.')
+    parser.add_argument('--debounce', metavar='seconds', type=float, default=1.0, help='Time a document must stay unchanged before it is processed, default 1 s.')
+    parser.add_argument('--initial', action='store_true', help='Process all the documents at start, by default only the ones that are newer than their .pdf file.')
+    WordTea.addOptions(parser)
+    args = parser.parse_args()
+    WordTea.checkOptions(args)
+    if not (args.stats is None):
+        parser.error("--stats is for single documents, run WordTea.py with --stats instead")
+    setupLogging(args.silent, args.verbose, args.log_file)
+    if args.interval <= 0 or args.debounce < 0:
+        parser.error("--interval must be positive and --debounce not negative")
+    if not (args.o is None):
+        os.makedirs(args.o, exist_ok=True)
+
+    watcher = documentWatcher(args)
+    # Created before watching, so a missing backend is found early and the
+    # converter is ready for the first change
+    watcher.converter = getConverter(args.pdf, args.soffice)
+    watcher.run()
+    return 0
+
+
+if __name__ == "__main__":
+    if __main__():
+        sys.exit(1)
@@ -0,0 +1,492 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+# BibTeX support of the citations. The .bib file is parsed into a dictionary
+# of entries by citation key. The parsed entries are kept in a cache file next
+# to the .bib file (<name>.bib.wtbib), together with the hash of the .bib file,
+# so a large bibliography is only parsed again when it changes. The cache file
+# is plain JSON, loading it never runs code.
+
+import os
+import re
+import copy
+import json
+import hashlib
+import unicodedata
+from logSetup import log
+from storyIterator import paragraphRuns, XML_SPACE
+
+# Increase when the format of the cache file changes
+CACHE_VERSION = 2
+
+# Marker of the reference list in the document
+BIB_MARKER = re.compile(r'\^\s*bibliography\s*\^', re.I)
+
+ENTRY = re.compile(r'@\s*([A-Za-z]+)\s*([\{\(])')
+KEY = re.compile(r'\s*([^,\s\}\)]*)\s*,')
+FIELD = re.compile(r'\s*([^\s=,\{\}\(\)"#]+)\s*=\s*')
+TOKEN = re.compile(r'[^\s#,\}\)]+')
+BRACES = re.compile(r'\\.|[{}]')
+QUOTE = re.compile(r'\\.|[{}"]')
+AND = re.compile(r'\s+and\s+', re.I)
+
+months = {'jan': 'January', 'feb': 'February', 'mar': 'March', 'apr': 'April', 'may': 'May', 'jun': 'June',
+          'jul': 'July', 'aug': 'August', 'sep': 'September', 'oct': 'October', 'nov': 'November', 'dec': 'December'}
+
+# LaTeX accents and the unicode combining characters
+accents = {"'": '\u0301', '`': '\u0300', '^': '\u0302', '"': '\u0308', '~': '\u0303', '=': '\u0304',
+           '.': '\u0307', 'u': '\u0306', 'v': '\u030c', 'H': '\u030b', 'c': '\u0327', 'k': '\u0328'}
+# The letter accents (e.g. \\u{a}) need a space or a brace, so \\url is not one
+ACCENT = re.compile(r'\\([\'`^"~=.]|[uvHck](?=[\s{]))\s*\{?\s*(\\?[A-Za-z])(?:\s*\})?')
+COMMAND = re.compile(r'\\([A-Za-z]+)\s*|\\(.)')
+symbols = {'&': '&', '%': '%', '$': '$', '#': '#', '_': '_', '{': '{', '}': '}', 'ss': '\u00df',
+           'o': '\u00f8', 'O': '\u00d8', 'ae': '\u00e6', 'AE': '\u00c6', 'aa': '\u00e5', 'AA': '\u00c5',
+           'l': '\u0142', 'L': '\u0141', 'i': 'i', 'j': 'j', ' ': ' '}
+
+
+###############################################################
+# Parser ######################################################
+###############################################################
+
+# Function that returns the position of the brace that closes the one at pos
+def closeBrace(text, pos):
+    depth = 0
+    for m in BRACES.finditer(text, pos):
+        c = m.group(0)
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return m.start()
+    raise ValueError("unbalanced braces")
+
+
+# Function that returns the position of the quote that closes the one at pos
+def closeQuote(text, pos):
+    depth = 0
+    for m in QUOTE.finditer(text, pos + 1):
+        c = m.group(0)
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+        elif c == '"' and depth == 0:
+            return m.start()
+    raise ValueError("unbalanced quotes")
+
+
+# Function that parses a field value (braces, quotes, numbers or string
+# macros joined with #), returns the value and the position after it
+def parseValue(text, pos, strings):
+    parts = list()
+    while True:
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        if pos >= len(text):
+            raise ValueError("unexpected end of file")
+        c = text[pos]
+        if c == '{':
+            end = closeBrace(text, pos)
+            parts.append(text[pos + 1:end])
+            pos = end + 1
+        elif c == '"':
+            end = closeQuote(text, pos)
+            parts.append(text[pos + 1:end])
+            pos = end + 1
+        else:
+            m = TOKEN.match(text, pos)
+            if m is None:
+                raise ValueError("missing value")
+            token = m.group(0)
+            parts.append(strings.get(token.lower(), token))
+            pos = m.end()
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        if pos < len(text) and text[pos] == '#':
+            pos += 1
+        else:
+            return ''.join(parts), pos
+
+
+# Function that parses the fields of an entry up to its closing character
+def parseFields(text, pos, close, strings):
+    fields = dict()
+    while True:
+        while pos < len(text) and (text[pos].isspace() or text[pos] == ','):
+            pos += 1
+        if pos >= len(text):
+            raise ValueError("unexpected end of file")
+        if text[pos] == close:
+            return fields, pos + 1
+        m = FIELD.match(text, pos)
+        if m is None:
+            raise ValueError("bad field")
+        [value, pos] = parseValue(text, m.end(), strings)
+        fields[m.group(1).lower()] = value
+
+
+def parseBibtex(text):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        parseBibtex                                                               #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Parses the text of a .bib file. @string macros are expanded, @comment     #
+    #        and @preamble are skipped. An entry with a syntax error is reported and   #
+    #        skipped, the parsing continues with the next entry.                       #
+    #                                                                                  #
+    # Return Arguments:                                                                #
+    #        entries : Dictionary citation key (lower case) -> entry, an entry is a   #
+    #                  dictionary with the fields (lower case names) and the type and  #
+    #                  the key of the entry as 'ENTRYTYPE' and 'ID'                     #
+    ####################################################################################
+    """
+    entries = dict()
+    strings = dict(months)
+    pos = 0
+    while True:
+        m = ENTRY.search(text, pos)
+        if m is None:
+            break
+        kind = m.group(1).lower()
+        close = '}' if m.group(2) == '{' else ')'
+        pos = m.end()
+        try:
+            if kind in ('comment', 'preamble'):
+                if close == '}':
+                    pos = closeBrace(text, m.end() - 1) + 1
+                else:
+                    pos = text.index(')', pos) + 1
+                continue
+            if kind == 'string':
+                [fields, pos] = parseFields(text, pos, close, strings)
+                strings.update(fields)
+                continue
+            k = KEY.match(text, pos)
+            if k is None:
+                raise ValueError("missing citation key")
+            [fields, pos] = parseFields(text, k.end(), close, strings)
+            key = k.group(1).lower()
+            if key in entries:
+                log.warning("!!!WARNING!!! BibTeX entry \"%s\" is defined more than once. Only the first definition is used.", key)
+                continue
+            fields['ENTRYTYPE'] = kind
+            fields['ID'] = k.group(1)
+            entries[key] = fields
+        except ValueError as e:
+            line = text.count('\n', 0, m.start()) + 1
+            log.warning("!!!WARNING!!! BibTeX entry at line %d is skipped: %s.", line, e)
+            pos = m.end()
+    return entries
+
+
+###############################################################
+# Formatting ##################################################
+###############################################################
+
+# Function that transforms LaTeX text to plain text
+def cleanLatex(text):
+    text = ACCENT.sub(lambda m: m.group(2).lstrip('\\') + accents[m.group(1)], text)
+    text = COMMAND.sub(lambda m: symbols.get(m.group(1) or m.group(2), ''), text)
+    text = text.replace('{', '').replace('}', '').replace('~', ' ')
+    text = text.replace('---', '\u2014').replace('--', '\u2013')
+    return unicodedata.normalize('NFC', ' '.join(text.split()))
+
+
+# Function that splits a list of names at the "and" outside of braces
+def splitNames(text):
+    names = list()
+    depth = 0
+    start = 0
+    for m in re.finditer(r'[{}]|\s+and\s+', text, re.I):
+        c = m.group(0)
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+        elif depth == 0:
+            names.append(text[start:m.start()])
+            start = m.end()
+    names.append(text[start:])
+    return [name.strip() for name in names if name.strip() != '']
+
+
+# Function that formats a name as initials and last name, e.g. D. Stathis
+def formatName(name):
+    if name.startswith('{') and name.endswith('}'):
+        return cleanLatex(name)
+    if ',' in name:
+        parts = [part.strip() for part in name.split(',')]
+        last = parts[0]
+        first = parts[-1] if len(parts) > 1 else ''
+    else:
+        words = name.split()
+        last = words[-1] if words else ''
+        first = ' '.join(words[:-1])
+    initials = ' '.join(word[0] + '.' for word in cleanLatex(first).replace('-', ' ').split() if word)
+    last = cleanLatex(last)
+    if initials == '':
+        return last
+    return initials + ' ' + last
+
+
+def formatAuthors(text):
+    names = [formatName(name) for name in splitNames(text)]
+    if len(names) > 6:
+        return names[0] + ' et al.'
+    if len(names) > 2:
+        return ', '.join(names[:-1]) + ', and ' + names[-1]
+    return ' and '.join(names)
+
+
+def formatEntry(entry):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        formatEntry                                                               #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Formats an entry as the text of the reference list, in a style close to  #
+    #        IEEE: authors, "title," journal or book title, volume, number, pages,    #
+    #        publisher, date.                                                          #
+    ####################################################################################
+    """
+    get = lambda name: cleanLatex(entry[name]) if entry.get(name, '').strip() != '' else None
+    parts = list()
+    if get('author'):
+        parts.append(formatAuthors(entry['author']))
+    elif get('editor'):
+        parts.append(formatAuthors(entry['editor']) + ', Ed.')
+    kind = entry.get('ENTRYTYPE', 'misc')
+    title = get('title')
+    if title:
+        if kind in ('book', 'proceedings'):
+            parts.append(title)
+        else:
+            parts.append('"' + title + ',"')
+    if get('journal'):
+        parts.append(get('journal'))
+    elif get('booktitle'):
+        parts.append('in ' + get('booktitle'))
+    for name, prefix in (('edition', ''), ('volume', 'vol. '), ('number', 'no. '), ('chapter', 'ch. ')):
+        if get(name):
+            parts.append(prefix + get(name) + (' ed.' if name == 'edition' else ''))
+    if get('pages'):
+        pages = get('pages')
+        parts.append(('pp. ' if re.search(r'[\u2013,-]', pages) else 'p. ') + pages)
+    for name in ('school', 'institution', 'organization', 'publisher', 'address', 'howpublished', 'note'):
+        if get(name):
+            parts.append(get(name))
+    date = ' '.join(value for value in (get('month'), get('year')) if value)
+    if date:
+        parts.append(date)
+    if get('doi'):
+        parts.append('doi: ' + get('doi'))
+    if not parts:
+        return entry.get('ID', '')
+    # The closing comma of the title is part of the quotes
+    text = ''
+    for i, part in enumerate(parts):
+        text += part
+        if i < len(parts) - 1 and not part.endswith(',"'):
+            text += ','
+        if i < len(parts) - 1:
+            text += ' '
+    if not text.endswith('.'):
+        text += '.'
+    return text
+
+
+###############################################################
+# Bibliography ################################################
+###############################################################
+
+class bibliography:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        bibliography                                                              #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        The entries of a .bib file, looked up by citation key. The entries are   #
+    #        read from the cache file when the hash of the .bib file has not changed. #
+    ####################################################################################
+    """
+
+    ################################################################################################
+    # Begin : Constructor                                                                          #
+    ################################################################################################
+    def __init__(self, path, cache=True, save=True):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        bibliography constractor                                                  #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        path    : Path to the .bib file                                           #
+        #        cache   : Use the cache file (<path>.wtbib), default True                 #
+        #        save    : Write the cache file if it is missing or out of date, default  #
+        #                  True. With False an existing cache is only read                 #
+        ####################################################################################
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.hash = hashlib.sha256(data).hexdigest()
+        self.entries = None
+        cache_file = path + '.wtbib'
+        if cache:
+            self.entries = self.loadCache(cache_file)
+        if self.entries is None:
+            self.entries = parseBibtex(data.decode('utf-8-sig', errors='replace'))
+            log.info("Info: Parsed %d BibTeX entries from %s.", len(self.entries), path)
+            if cache and save:
+                self.saveCache(cache_file)
+        else:
+            log.info("Info: Loaded %d BibTeX entries of %s from the cache.", len(self.entries), path)
+################################################################################################
+# End : Constructor                                                                            #
+################################################################################################
+
+    def loadCache(self, cache_file):
+        if not os.path.isfile(cache_file):
+            return None
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get('version') != CACHE_VERSION or data.get('hash') != self.hash:
+            return None
+        entries = data.get('entries')
+        # Every entry is a dictionary of strings, see parseBibtex
+        if not isinstance(entries, dict):
+            return None
+        for entry in entries.values():
+            if not isinstance(entry, dict) or not all(isinstance(value, str) for value in entry.values()):
+                return None
+        return entries
+
+    def saveCache(self, cache_file):
+        tmp = cache_file + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'hash': self.hash, 'entries': self.entries}, f, ensure_ascii=False)
+            os.replace(tmp, cache_file)
+        except OSError as e:
+            log.warning("!!!WARNING!!! BibTeX cache %s could not be saved (%s).", cache_file, e)
+        return 1
+
+    def __contains__(self, key):
+        return key.strip().lower() in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        return self.entries.get(key.strip().lower())
+
+    def format(self, key):
+        entry = self.get(key)
+        if entry is None:
+            return None
+        return formatEntry(entry)
+
+    def referenceLines(self, lst):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        referenceLines                                                            #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Returns the lines of the reference list of the citations of a            #
+        #        referenceList, in the order of their numbers, e.g. "[1] D. Stathis, ..." #
+        ####################################################################################
+        """
+        if lst.numberTable is None:
+            lst.buildTable(False)
+        lines = list()
+        for i, key in enumerate(lst.entries.labels):
+            txt = self.format(key)
+            if txt is None:
+                log.warning("!!!WARNING!!! Citation \"%s\" is not in the bibliography %s.", key, self.path)
+                txt = key
+            lines.append('[' + lst.numberTable[i] + '] ' + txt)
+        return lines
+
+
+# Bibliographies loaded by this process, (path, modification time, size) ->
+# bibliography, so the watch and batch modes read a .bib file only once
+loaded = dict()
+
+
+# Function that returns the bibliography of a .bib file, the cache file is
+# not written without save (e.g. in check mode)
+def loadBibliography(path, save=True):
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    if key not in loaded:
+        loaded[key] = bibliography(path, save=save)
+    return loaded[key]
+
+
+# Function that returns the lines of the reference list of all the
+# bibliographies of a labelScanner
+def bibliographyLines(scanner):
+    lines = list()
+    for kind, bib in scanner.bibliographies.items():
+        lines += bib.referenceLines(scanner.kinds[kind])
+    return lines
+
+
+# Function that replaces a ^bibliography^ paragraph (w:p element) with the
+# lines of the reference list. The paragraph keeps the first line and a copy
+# of it (same style) is made for every other line. Returns the copies, in
+# order, to be placed after the paragraph.
+def expandMarker(p, lines):
+    W = p.tag[:p.tag.index('}') + 1]
+    runs = paragraphRuns(p)
+    for t in runs:
+        t.text = ''
+    if not lines:
+        return list()
+    if not runs:
+        r = p.makeelement(W + 'r')
+        t = r.makeelement(W + 't')
+        r.append(t)
+        p.append(r)
+        runs = [t]
+    runs[0].text = lines[0]
+    runs[0].set(XML_SPACE, 'preserve')
+    extra = list()
+    for line in lines[1:]:
+        q = copy.deepcopy(p)
+        paragraphRuns(q)[0].text = line
+        extra.append(q)
+    return extra
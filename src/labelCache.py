@@ -0,0 +1,313 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+# Label cache, keeps the label database of a document between runs. For every
+# paragraph the cache stores the hash of its text and the labels and tags found
+# in it, together with the order of the declarations and the entries of every
+# reference list. On the next run only the paragraphs with a new text are
+# scanned, and the numbering is restored up to the first declaration that
+# changed and recomputed from there on. The cache file is plain JSON, so a
+# cache file is only data and never runs code when it is loaded.
+
+import os
+import bisect
+import json
+import hashlib
+import stats
+from logSetup import log
+from UtilFunctions import runBuffer
+from storyIterator import runText
+
+# Increase when the format of the cache file changes
+CACHE_VERSION = 4
+
+
+class labelCache:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        labelCache                                                                #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Replaces the build phase of the labelScanner with an incremental one.     #
+    #        The paragraphs are given to addParagraph (or buildList) in the order of   #
+    #        the document and finish adds the labels to the lists, builds the number   #
+    #        tables and saves the cache file.                                          #
+    ####################################################################################
+    """
+
+    ################################################################################################
+    # Begin : Constructor                                                                          #
+    ################################################################################################
+    def __init__(self, path, scanner, v1, v2):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        labelCache constractor                                                    #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Loads the cache file, if it exists and was made for the same lists.      #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        path    : Path to the cache file                                          #
+        #        scanner : labelScanner with the reference lists                           #
+        #        v1      : Verbose level 1                                                 #
+        #        v2      : Verbose level 2                                                 #
+        ####################################################################################
+        """
+        self.path = path
+        self.scanner = scanner
+        self.v1 = v1
+        self.v2 = v2
+        self.signature = self.getSignature()
+        # Data of the previous run
+        self.old = None
+        # Paragraph hash -> hits, declarations and entry positions of this run
+        self.paragraphs = dict()
+        self.declarations = list()
+        self.positions = dict((kind, list()) for kind in scanner.kinds)
+        # Statistics
+        self.reused = 0
+        self.scanned = 0
+        self.load()
+################################################################################################
+# End : Constructor                                                                            #
+################################################################################################
+
+################################################################################################
+# Begin : Load/Save functions                                                                  #
+################################################################################################
+
+    # The lists (kind, style and parent) the cache is valid for
+    def getSignature(self):
+        rtn = list()
+        for lst in self.scanner.lists:
+            if lst.parent is None:
+                rtn.append((lst.label.lower(), lst.style, None))
+            else:
+                rtn.append((lst.label.lower(), lst.style, lst.parent.label.lower()))
+        # The keys of a bibliography decide which tags declare a label
+        bibs = tuple(sorted((kind, bib.hash) for kind, bib in self.scanner.bibliographies.items()))
+        # In the form it has after a JSON round trip, the tuples become lists
+        return json.loads(json.dumps((CACHE_VERSION, tuple(rtn), bibs)))
+
+    # Checks the structure of the data of a cache file and turns the
+    # declarations back to tuples, returns None if the data is not valid
+    def checkData(self, data):
+        if not isinstance(data, dict):
+            return None
+        paragraphs = data.get('paragraphs')
+        declarations = data.get('declarations')
+        positions = data.get('positions')
+        states = data.get('states')
+        if not (isinstance(paragraphs, dict) and isinstance(declarations, list) and isinstance(positions, dict) and isinstance(states, dict)):
+            return None
+        for hits in paragraphs.values():
+            if not isinstance(hits, list) or not all(isinstance(hit, list) and len(hit) == 5 for hit in hits):
+                return None
+        if not all(isinstance(d, list) and len(d) == 3 for d in declarations):
+            return None
+        for kind in self.scanner.kinds:
+            state = states.get(kind)
+            if not isinstance(positions.get(kind), list) or not isinstance(state, dict):
+                return None
+            if not all(isinstance(state.get(key), list) for key in ('labels', 'counts', 'parents')):
+                return None
+        data['declarations'] = [tuple(d) for d in declarations]
+        return data
+
+    def load(self):
+        if not os.path.isfile(self.path):
+            if self.v1:
+                log.info("Info: No label cache found at %s, all the paragraphs are scanned.", self.path)
+            return 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning("!!!WARNING!!! Label cache %s could not be read (%s), it is rebuilt.", self.path, e)
+            return 0
+        if not isinstance(data, dict) or data.get('signature') != self.signature:
+            log.warning("!!!WARNING!!! Label cache %s was made for other reference lists, it is rebuilt.", self.path)
+            return 0
+        self.old = self.checkData(data)
+        if self.old is None:
+            log.warning("!!!WARNING!!! Label cache %s is not valid, it is rebuilt.", self.path)
+            return 0
+        return 1
+
+    def save(self):
+        data = {'signature': self.signature,
+                'paragraphs': self.paragraphs,
+                'declarations': self.declarations,
+                'positions': self.positions,
+                'states': dict((kind, self.jsonState(lst.getState())) for kind, lst in self.scanner.kinds.items())}
+        # Write next to the cache and rename, so a failed run never leaves half a file
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, self.path)
+        return 1
+
+    # A state of getState with the arrays as lists
+    def jsonState(self, state):
+        return dict((key, list(value)) for key, value in state.items())
+
+################################################################################################
+# End : Load/Save functions                                                                    #
+################################################################################################
+
+################################################################################################
+# Begin : Add paragraph function                                                               #
+################################################################################################
+
+    def addParagraph(self, text):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        addParagraph                                                              #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Returns the hits of the paragraph text, see labelScanner.scan. The text   #
+        #        is only scanned if no paragraph with the same text was in the cache.     #
+        #        The declared labels are kept until finish.                                #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        text    : Text of the paragraph                                           #
+        #                                                                                  #
+        # Return Arguments:                                                                #
+        #        hits    : List of (symbol, kind, label, start, end) tuples                #
+        ####################################################################################
+        """
+        key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+        hits = self.paragraphs.get(key)
+        if hits is None:
+            if self.old is not None:
+                hits = self.old['paragraphs'].get(key)
+            if hits is None:
+                hits = self.scanner.scan(text)
+                self.scanned += 1
+            else:
+                self.reused += 1
+            self.paragraphs[key] = hits
+        else:
+            self.reused += 1
+        for [symbol, kind, label, start, end] in hits:
+            # The tags of a bibliography kind can declare their label, see labelScanner.declare
+            if symbol == '^' or kind in self.scanner.bibliographies:
+                self.declarations.append((symbol, kind, label))
+        return hits
+
+################################################################################################
+# End : Add paragraph function                                                                 #
+################################################################################################
+
+################################################################################################
+# Begin : Build list function                                                                  #
+################################################################################################
+
+    def buildList(self, pr):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        buildList                                                                 #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Same as labelScanner.buildList, with the scan done by addParagraph.      #
+        #        The text of the runs is read directly from the xml (see runText), only   #
+        #        the paragraphs with labels get a runBuffer of the same runs, to remove   #
+        #        them.                                                                     #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        pr      : Paragraph to be searched for labels                             #
+        ####################################################################################
+        """
+        text = runText(pr)
+        hits = self.addParagraph(text)
+        self.scanner.markLocation(pr, hits, text)
+        if not any(hit[0] == '^' for hit in hits):
+            return 1
+        buf = runBuffer(pr.runs)
+        for [symbol, kind, label, start, end] in hits:
+            if symbol == '^':
+                # Remove the label from the text
+                buf.replace(start, end, '')
+        if buf.apply() and self.v2:
+            log.debug("Paragraph after : \n%s", buf.text)
+        return 1
+
+################################################################################################
+# End : Build list function                                                                    #
+################################################################################################
+
+################################################################################################
+# Begin : Finish function                                                                      #
+################################################################################################
+
+    def finish(self):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        finish                                                                    #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Restores the lists up to the first declaration that is not the same as   #
+        #        in the cache, adds the rest of the declarations, builds the number       #
+        #        tables and saves the cache file.                                          #
+        ####################################################################################
+        """
+        kinds = self.scanner.kinds
+        first = 0
+        if self.old is not None:
+            old = self.old['declarations']
+            limit = min(len(old), len(self.declarations))
+            while first < limit and old[first] == self.declarations[first]:
+                first += 1
+            for kind, lst in kinds.items():
+                keep = bisect.bisect_left(self.old['positions'][kind], first)
+                lst.setState(self.old['states'][kind], keep)
+                self.positions[kind] = self.old['positions'][kind][:keep]
+        if stats.active is not None:
+            stats.active.count('cache_reused', self.reused)
+            stats.active.count('cache_scanned', self.scanned)
+        if self.v1:
+            log.info("Info: Label cache reused %d paragraphs and scanned %d, numbering recomputed from declaration %d of %d.", self.reused, self.scanned, first, len(self.declarations))
+        for i in range(first, len(self.declarations)):
+            symbol, kind, label = self.declarations[i]
+            if self.v2:
+                log.debug("Info: Label cache adds label %s for class %s.", label, kinds[kind].name)
+            if self.scanner.declare(symbol, kind, label, self.v1, self.v2):
+                self.positions[kind].append(i)
+        self.scanner.buildTables(self.v2)
+        try:
+            self.save()
+        except OSError as e:
+            log.warning("!!!WARNING!!! Label cache %s could not be saved (%s).", self.path, e)
+        return 1
+
+################################################################################################
+# End : Finish function                                                                        #
+################################################################################################
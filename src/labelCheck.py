@@ -0,0 +1,175 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+# Check mode of WordTea (--check). Finds the tags of undeclared labels, the
+# labels that are declared twice and the labels that are never referenced,
+# without changing the document: the xml parts are read with the streaming
+# parser of the stream engine, no run is changed and no file is written. The
+# result is a report with the location (part and paragraph) of every problem.
+
+import zipfile
+from lxml import etree
+import stats
+from streamEngine import iterBlocks, storyParts, DOCUMENT_XML
+from storyIterator import storyParagraphs, paragraphRuns
+
+# Characters of the paragraph text kept in a diagnostic
+TEXT_LIMIT = 200
+
+
+class labelChecker:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        labelChecker                                                              #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Runs the build phase of a labelScanner on a document and resolves all     #
+    #        the tags against the number tables, read-only. Every problem is added     #
+    #        to the list of diagnostics (dictionaries, see diagnostic).                #
+    ####################################################################################
+    """
+
+    ################################################################################################
+    # Begin : Constructor                                                                          #
+    ################################################################################################
+    def __init__(self, scanner, v1, v2):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        labelChecker constractor                                                  #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        scanner : labelScanner with the reference lists, empty                    #
+        #        v1      : Verbose level 1                                                 #
+        #        v2      : Verbose level 2                                                 #
+        ####################################################################################
+        """
+        self.scanner = scanner
+        self.v1 = v1
+        self.v2 = v2
+        self.diagnostics = list()
+        # (kind, label) -> location of the first declaration
+        self.declared = dict()
+        # (kind, label, tag text, location) of every tag, resolved after the build
+        self.tags = list()
+################################################################################################
+# End : Constructor                                                                            #
+################################################################################################
+
+################################################################################################
+# Begin : Check function                                                                       #
+################################################################################################
+
+    def check(self, in_file):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        check                                                                     #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Checks the labels and the tags of a .docx file and returns the report.   #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        in_file : Path to the input .docx file                                    #
+        #                                                                                  #
+        # Return Arguments:                                                                #
+        #        report  : Dictionary with the document, the number of errors and         #
+        #                  warnings, the number of labels of every kind and the list of    #
+        #                  diagnostics, ready for json.dump                                #
+        ####################################################################################
+        """
+        with stats.phase('build'):
+            for part, number, text in self.paragraphs(in_file):
+                self.scanParagraph(part, number, text)
+            self.scanner.buildTables(self.v2)
+        with stats.phase('check'):
+            for kind, label, tag, location in self.tags:
+                if self.scanner.kinds[kind].resolve(label) is None:
+                    self.diagnostic('error', 'undeclared', kind, label, location, tag=tag)
+            for kind, lst in self.scanner.kinds.items():
+                lst.checkRefList()
+                for label in lst.entries.unreferenced():
+                    self.diagnostic('warning', 'unused', kind, label, self.declared[(kind, label)])
+        errors = len([d for d in self.diagnostics if d['severity'] == 'error'])
+        return {'document': in_file,
+                'errors': errors,
+                'warnings': len(self.diagnostics) - errors,
+                'labels': dict((kind, lst.counter) for kind, lst in self.scanner.kinds.items()),
+                'diagnostics': self.diagnostics}
+
+    # Yields (part, paragraph number, text) for all the paragraphs of the
+    # document, the body first and then the headers and the footers. The
+    # paragraphs are numbered from 1 in every part, in document order.
+    def paragraphs(self, in_file):
+        with zipfile.ZipFile(in_file) as zin:
+            number = 0
+            with zin.open(DOCUMENT_XML) as stream:
+                for event, elem in iterBlocks(stream):
+                    if event == 'block':
+                        for p in storyParagraphs(elem):
+                            number += 1
+                            yield (DOCUMENT_XML, number, self.paragraphText(p))
+            for name in storyParts(zin):
+                with zin.open(name) as stream:
+                    root = etree.parse(stream).getroot()
+                for number, p in enumerate(storyParagraphs(root), 1):
+                    yield (name, number, self.paragraphText(p))
+
+    def paragraphText(self, p):
+        runs = paragraphRuns(p)
+        if stats.active is not None:
+            stats.active.count('paragraphs')
+            stats.active.count('runs', len(runs))
+        return ''.join(t.text or '' for t in runs)
+
+    # Declares the labels of a paragraph and keeps its tags for the check
+    def scanParagraph(self, part, number, text):
+        hits = self.scanner.scan(text)
+        if len(hits) == 0:
+            return 1
+        location = {'part': part, 'paragraph': number, 'text': text[:TEXT_LIMIT]}
+        for [symbol, kind, label, start, end] in hits:
+            key = (kind, label.strip())
+            if symbol == '^' and key in self.declared and not (kind in self.scanner.bibliographies):
+                self.diagnostic('error', 'duplicate', kind, key[1], location, first={'part': self.declared[key]['part'], 'paragraph': self.declared[key]['paragraph']})
+            if self.scanner.declare(symbol, kind, label, self.v1, self.v2):
+                self.declared[key] = location
+            if symbol == '`':
+                self.tags.append((kind, label, text[start:end], location))
+        return 1
+
+################################################################################################
+# End : Check function                                                                         #
+################################################################################################
+
+    # Adds a diagnostic, extra are added to it as they are (e.g. the tag)
+    def diagnostic(self, severity, code, kind, label, location, **extra):
+        entry = {'severity': severity, 'code': code, 'kind': kind, 'label': label,
+                 'part': location['part'], 'paragraph': location['paragraph'], 'text': location['text']}
+        entry.update(extra)
+        self.diagnostics.append(entry)
+        return 1
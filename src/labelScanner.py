@@ -0,0 +1,376 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+import re
+import stats
+from logSetup import log
+from UtilFunctions import runBuffer
+from bibtex import BIB_MARKER
+
+# Combined patterns of the scanners, by kinds. Shared by all the scanners of a
+# process, so the pattern is compiled once when many documents are processed.
+scannerPatterns = dict()
+
+
+class labelScanner:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        labelScanner                                                              #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Scans the text of a paragraph once for the labels (^kind{label}^) and     #
+    #        the tags (`kind{label}`) of all the registered reference lists. Each hit  #
+    #        is sent to the reference list of its kind, so the cost of a paragraph     #
+    #        does not depend on the number of lists.                                   #
+    ####################################################################################
+    """
+
+    ################################################################################################
+    # Begin : Constructor                                                                          #
+    ################################################################################################
+    def __init__(self, lists):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        labelScanner constractor                                                  #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        lists : The referenceList objects to be served by the scanner. The order  #
+        #                of the list is the order in which the kinds are processed.       #
+        ####################################################################################
+        """
+        self.lists = list(lists)
+        # Kind -> bibliography, see addBibliography
+        self.bibliographies = dict()
+        # (tags, paragraph text) of the paragraphs with tags that are not resolved
+        self.unresolved = list()
+        # Paragraphs with labels or tags (or a ^bibliography^ marker) found by
+        # the build phase, in document order. None if not recorded, see
+        # startLocations
+        self.locations = None
+        self.kinds = dict()
+        for lst in self.lists:
+            self.kinds[lst.label.lower()] = lst
+        # Longest kinds first, so a kind is never matched by one of its prefixes
+        kinds = tuple(sorted(self.kinds, key=len, reverse=True))
+        if kinds not in scannerPatterns:
+            alternation = '|'.join(re.escape(kind) for kind in kinds)
+            scannerPatterns[kinds] = re.compile(r"([\^`])\s*(" + alternation + r")\s*\{([^\}]+)\}\s*\1", re.I)
+        self.pattern = scannerPatterns[kinds]
+################################################################################################
+# End : Constructor                                                                            #
+################################################################################################
+
+################################################################################################
+# Begin : Bibliography functions                                                               #
+################################################################################################
+
+    def addBibliography(self, kind, bib):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        addBibliography                                                           #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Links a bibliography to a kind (e.g. cite). The tags of the kind with a  #
+        #        key of the bibliography declare their label as well, so the citations   #
+        #        are numbered in the order they first appear in the text.                 #
+        ####################################################################################
+        """
+        self.bibliographies[kind.lower()] = bib
+        return 1
+
+    def declare(self, symbol, kind, label, v1, v2):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        declare                                                                   #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Adds the label of a hit to the list of its kind if the hit declares it:  #
+        #        all the labels (^kind{label}^), and the first tag of a bibliography key. #
+        #                                                                                  #
+        # Return Arguments:                                                                #
+        #        rtn     : 1 if the label is added, 0 if not                               #
+        ####################################################################################
+        """
+        lst = self.kinds[kind]
+        bib = self.bibliographies.get(kind)
+        if not (bib is None):
+            # The tag and the label of a citation can come in any order
+            if label.strip().lower() in lst.entries:
+                return 0
+            if symbol == '`' and not (label in bib):
+                return 0
+        elif symbol != '^':
+            return 0
+        return lst.addLabel(label, v1, v2)
+
+################################################################################################
+# End : Bibliography functions                                                                 #
+################################################################################################
+
+################################################################################################
+# Begin : Location functions                                                                   #
+################################################################################################
+
+    def startLocations(self):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        startLocations                                                            #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Starts recording the locations of the build phase. The replace phase     #
+        #        then only visits the recorded paragraphs instead of the whole document.  #
+        ####################################################################################
+        """
+        self.locations = list()
+        return 1
+
+    def markLocation(self, location, hits, text):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        markLocation                                                              #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Records a paragraph of the build phase if it has labels or tags, or the  #
+        #        marker of the reference list. The labels are kept for the stream engine, #
+        #        that removes them in the replace phase. Nothing is recorded before      #
+        #        startLocations.                                                           #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        location : The paragraph, or its position (e.g. part and number)         #
+        #        hits     : The hits of the paragraph, see scan                            #
+        #        text     : The text of the paragraph                                      #
+        ####################################################################################
+        """
+        if self.locations is None:
+            return 0
+        if not hits and not (self.bibliographies and BIB_MARKER.search(text)):
+            return 0
+        self.locations.append(location)
+        return 1
+
+    def markCopy(self, location, text):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        markCopy                                                                  #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Records a paragraph of a mc:Fallback copy of a text box, see markLocation.#
+        #        Its labels are not declared (the mc:Choice copy declares them), the      #
+        #        replace phase removes them and replaces its tags.                         #
+        ####################################################################################
+        """
+        if self.locations is None:
+            return 0
+        return self.markLocation(location, self.scan(text), text)
+
+################################################################################################
+# End : Location functions                                                                     #
+################################################################################################
+
+################################################################################################
+# Begin : Scan function                                                                        #
+################################################################################################
+
+    def scan(self, text):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        scan                                                                      #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Finds all the labels and tags of all the registered kinds in one pass.   #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        text    : Text to be searched                                             #
+        #                                                                                  #
+        # Return Arguments:                                                                #
+        #        hits    : List of (symbol, kind, label, start, end) tuples, symbol is '^' #
+        #                  for labels and '`' for tags                                     #
+        ####################################################################################
+        """
+        hits = list()
+        if ('^' not in text) and ('`' not in text):
+            return hits
+        if stats.active is not None:
+            stats.active.count('regex')
+        for m in self.pattern.finditer(text):
+            hits.append((m.group(1), m.group(2).lower(), m.group(3).lower(), m.start(), m.end()))
+        return hits
+
+################################################################################################
+# End : Scan function                                                                          #
+################################################################################################
+
+################################################################################################
+# Begin : Build list function                                                                  #
+################################################################################################
+
+    def buildList(self, pr, v1, v2):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        buildList                                                                 #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Scans the paragraph once, adds every declared label to the list of its    #
+        #        kind and removes the labels from the text. The paragraphs with labels or #
+        #        tags are recorded, see markLocation.                                      #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        pr      : Paragraph to be searched for labels                             #
+        #        v1      : Verbose level 1                                                 #
+        #        v2      : Verbose level 2                                                 #
+        ####################################################################################
+        """
+        buf = runBuffer(pr.runs)
+        hits = self.scan(buf.text)
+        self.markLocation(pr, hits, buf.text)
+        for [symbol, kind, label, start, end] in hits:
+            if symbol == '^':
+                if v2:
+                    log.debug("Info: Scanner found label %s for class %s.", label, self.kinds[kind].name)
+                self.declare(symbol, kind, label, v1, v2)
+                # Remove the label from the text
+                buf.replace(start, end, '')
+            elif self.bibliographies:
+                self.declare(symbol, kind, label, v1, v2)
+        if buf.apply() and v2:
+            log.debug("Paragraph after : \n%s", buf.text)
+        return 1
+
+################################################################################################
+# End : Build list function                                                                    #
+################################################################################################
+
+################################################################################################
+# Begin : Build tables function                                                                #
+################################################################################################
+
+    def buildTables(self, v2):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        buildTables                                                               #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Creates the number tables of all the lists, called once after the build  #
+        #        phase.                                                                    #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        v2      : Verbose level 2                                                 #
+        ####################################################################################
+        """
+        for lst in self.lists:
+            lst.buildTable(v2)
+        return 1
+
+################################################################################################
+# End : Build tables function                                                                  #
+################################################################################################
+
+################################################################################################
+# Begin : Match and replace function                                                           #
+################################################################################################
+
+    def matchNreplace(self, pr, v1, v2):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        matchNreplace                                                             #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Replaces all the tags of all the lists in the paragraph, see replaceRuns.#
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        pr      : Paragraph to be searched for tags                               #
+        #        v1      : Verbose level 1                                                 #
+        #        v2      : Verbose level 2                                                 #
+        ####################################################################################
+        """
+        self.replaceRuns(pr.runs, v1, v2)
+        return 1
+
+################################################################################################
+# End : Match and replace function                                                             #
+################################################################################################
+
+################################################################################################
+# Begin : Replace runs function                                                                #
+################################################################################################
+
+    def replaceRuns(self, runs, v1, v2):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        replaceRuns                                                               #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Removes the labels and replaces the tags in the text of a paragraph. The  #
+        #        runs are joined once and only the runs that overlap a label or a tag are  #
+        #        changed. All the tags are resolved in one pass, the tags that are not     #
+        #        declared are kept in the text and the paragraph is added to unresolved.   #
+        #        Must be called after buildTables.                                         #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        runs    : The runs of the paragraph (objects with a text attribute)       #
+        #        v1      : Verbose level 1                                                 #
+        #        v2      : Verbose level 2                                                 #
+        #                                                                                  #
+        # Return Arguments:                                                                #
+        #        changed : List of the changed runs                                        #
+        ####################################################################################
+        """
+        buf = runBuffer(runs)
+        missing = list()
+        for [symbol, kind, label, start, end] in self.scan(buf.text):
+            if symbol == '^':
+                buf.replace(start, end, '')
+            else:
+                txt = self.kinds[kind].resolve(label)
+                if txt is None:
+                    missing.append(buf.text[start:end])
+                else:
+                    if v1:
+                        log.info("Info: Match Tag final text : %s", buf.text[start:end])
+                    buf.replace(start, end, txt)
+        changed = buf.apply()
+        if changed and v2:
+            log.debug("Paragraph after replace : \n%s", buf.text)
+        if missing:
+            log.warning("!!!WARNING!!! Tag or label not found. Either wrong tag or wrong label was used! Tags : %s, check the following paragraph: \n%s", ', '.join(missing), buf.text)
+            self.unresolved.append((missing, buf.text))
+        return changed
+
+################################################################################################
+# End : Replace runs function                                                                  #
+################################################################################################
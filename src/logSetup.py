@@ -0,0 +1,108 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+# Logging of WordTea. All the modules write their messages to the "WordTea"
+# logger with lazy formatting (log.info("... %s", value)), so a message of a
+# disabled level costs only the call. The levels follow the verbose options:
+#   DEBUG   : --verbose, the text of the paragraphs before and after the changes
+#   INFO    : default (disabled by --silent), the labels and tags found
+#   PROCESS : always, the status of the processing
+#   WARNING : always, missing labels, duplicate declarations, etc.
+
+import sys
+import logging
+
+PROCESS = 25
+logging.addLevelName(PROCESS, 'PROCESS')
+
+log = logging.getLogger('WordTea')
+
+
+class stdoutHandler(logging.StreamHandler):
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        stdoutHandler                                                             #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Handler that writes to the current sys.stdout, so the output of the      #
+    #        workers can still be captured with contextlib.redirect_stdout.           #
+    ####################################################################################
+    """
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def setupLogging(v1, v2, log_file=None, stderr=False):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        setupLogging                                                              #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Sets the level of the logger from the verbose options and sends the      #
+    #        messages to stdout, or to log_file (with the time and the level) when    #
+    #        it is given. Can be called again, the previous handler is replaced.      #
+    #        With stderr the messages go to stderr, when stdout has the output of the #
+    #        run (e.g. the report of --check).                                         #
+    #                                                                                  #
+    # Input Arguments:                                                                 #
+    #        v1       : Verbose level 1                                                #
+    #        v2       : Verbose level 2                                                #
+    #        log_file : Path to the log file, None for stdout                          #
+    #        stderr   : Write to stderr instead of stdout                              #
+    ####################################################################################
+    """
+    if v2:
+        log.setLevel(logging.DEBUG)
+    elif v1:
+        log.setLevel(logging.INFO)
+    else:
+        log.setLevel(PROCESS)
+    for handler in list(log.handlers):
+        log.removeHandler(handler)
+        handler.close()
+    if log_file is None and stderr:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+    elif log_file is None:
+        handler = stdoutHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+    else:
+        handler = logging.FileHandler(log_file, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-8s %(message)s'))
+    log.addHandler(handler)
+    log.propagate = False
+    return log
@@ -0,0 +1,185 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+# Converters from the post-processed .docx file to .pdf. The conversion is a
+# separate stage of the processing, the backend is selected with the --pdf
+# option of WordTea.py or with the WORDTEA_PDF environment variable.
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import pathlib
+
+# Names of the available backends
+converterNames = ['word', 'libreoffice', 'none']
+
+
+class pdfConverter:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        pdfConverter                                                              #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Interface of the .pdf backends. convert creates the .pdf file from a      #
+    #        .docx file, close releases the resources of the backend (e.g. the Word   #
+    #        application). A converter can be used for many documents.               #
+    ####################################################################################
+    """
+    name = ''
+
+    def convert(self, docx_file, pdf_file):
+        raise NotImplementedError
+
+    def close(self):
+        return 1
+
+
+class noConverter(pdfConverter):
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        noConverter                                                               #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        No .pdf file is created, only the post-processed .docx file is kept.     #
+    ####################################################################################
+    """
+    name = 'none'
+
+    def convert(self, docx_file, pdf_file):
+        return 0
+
+
+class wordConverter(pdfConverter):
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        wordConverter                                                             #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Converts with Microsoft Word through COM (Windows only). Word is started  #
+    #        on the first conversion and kept open until close.                        #
+    ####################################################################################
+    """
+    name = 'word'
+    # Constant used for the pdf creation
+    wdFormatPDF = 17
+
+    def __init__(self):
+        self.word = None
+
+    def convert(self, docx_file, pdf_file):
+        if self.word is None:
+            # Only needed here, and only available on Windows
+            import comtypes.client
+            self.word = comtypes.client.CreateObject('Word.Application')
+        # TODO Find how to use catch problem
+        doc = self.word.Documents.Open(docx_file)
+        doc.SaveAs(pdf_file, FileFormat=self.wdFormatPDF)
+        doc.Close()
+        return 1
+
+    def close(self):
+        if not (self.word is None):
+            self.word.Quit()
+            self.word = None
+        return 1
+
+
+class libreOfficeConverter(pdfConverter):
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        libreOfficeConverter                                                      #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Converts with a local headless LibreOffice (soffice). Every converter     #
+    #        uses its own LibreOffice profile, so many converters (e.g. the workers    #
+    #        of the batch mode) can run at the same time.                              #
+    #                                                                                  #
+    # Input Arguments:                                                                 #
+    #        soffice : Path to the soffice executable, default found in the PATH       #
+    #        timeout : Time limit of one conversion in seconds, default no limit       #
+    ####################################################################################
+    """
+    name = 'libreoffice'
+
+    def __init__(self, soffice=None, timeout=None):
+        if soffice is None:
+            soffice = shutil.which('soffice') or shutil.which('libreoffice')
+        if soffice is None:
+            raise FileNotFoundError("LibreOffice (soffice) not found in the PATH, use --soffice or another --pdf backend")
+        self.soffice = soffice
+        self.timeout = timeout
+        self.profile = tempfile.mkdtemp(prefix='wordtea_lo_')
+
+    def convert(self, docx_file, pdf_file):
+        out_dir = tempfile.mkdtemp(prefix='wordtea_pdf_')
+        try:
+            cmd = [self.soffice, '--headless', '--norestore', '--nolockcheck',
+                   '-env:UserInstallation=' + pathlib.Path(self.profile).as_uri(),
+                   '--convert-to', 'pdf', '--outdir', out_dir, docx_file]
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=self.timeout)
+            name = os.path.splitext(os.path.basename(docx_file))[0] + '.pdf'
+            created = os.path.join(out_dir, name)
+            if result.returncode != 0 or not os.path.isfile(created):
+                raise RuntimeError("LibreOffice failed to convert " + docx_file + " :\n" + result.stdout.decode(errors='replace'))
+            shutil.move(created, pdf_file)
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+        return 1
+
+    def close(self):
+        shutil.rmtree(self.profile, ignore_errors=True)
+        return 1
+
+
+# Function that returns the default backend, the WORDTEA_PDF environment
+# variable or Word on Windows and LibreOffice on the other systems
+
+
+def defaultConverter():
+    name = os.environ.get('WORDTEA_PDF')
+    if name in converterNames:
+        return name
+    if sys.platform == 'win32':
+        return 'word'
+    return 'libreoffice'
+
+# Function that creates the converter of a backend
+
+
+def getConverter(name, soffice=None, timeout=None):
+    if name == 'word':
+        return wordConverter()
+    if name == 'libreoffice':
+        return libreOfficeConverter(soffice, timeout)
+    if name == 'none':
+        return noConverter()
+    raise ValueError("Unknown pdf backend " + str(name) + ", use one of " + str(converterNames))
@@ -0,0 +1,300 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+# Pipelined processing of many documents. The stages of WordTea.processFile
+# (load, cross-reference, save and convert) run in their own threads and are
+# connected with bounded queues, so while one document is converted to .pdf
+# the next ones are already loaded and cross-referenced.
+
+import os
+import time
+import queue
+import tempfile
+import threading
+import WordTea
+from pdfConverter import getConverter
+from logSetup import log, PROCESS
+
+
+class pipelineJob:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        pipelineJob                                                               #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        One document moving through the pipeline. A job that fails in a stage    #
+    #        skips the following stages and keeps the error in message.               #
+    ####################################################################################
+    """
+
+    def __init__(self, in_file, out_file, tmp_file):
+        self.in_file = in_file
+        self.out_file = out_file
+        self.keep_tmp = not (tmp_file is None)
+        # Without a temporary file requested, one from the system is created by
+        # the first stage that writes it, see tempFile
+        self.tmp_file = tmp_file
+        self.document = None
+        self.status = 'ok'
+        self.message = ''
+        self.times = dict()
+        self.start = time.perf_counter()
+        self.end = None
+
+    # Returns the temporary .docx file, created on the first call
+    def tempFile(self):
+        if self.tmp_file is None:
+            [fd, self.tmp_file] = tempfile.mkstemp(suffix='.docx')
+            os.close(fd)
+        return self.tmp_file
+
+    # Removes the temporary .docx file if it was created by tempFile
+    def removeTemp(self):
+        if not self.keep_tmp and not (self.tmp_file is None):
+            if os.path.isfile(self.tmp_file):
+                os.remove(self.tmp_file)
+            self.tmp_file = None
+
+
+class pipelineStage:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        pipelineStage                                                             #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        A stage of the pipeline, a number of worker threads that take the jobs   #
+    #        from the input queue, call the function of the stage and put the jobs in #
+    #        the output queue. None in a queue marks the end of the jobs. The stage   #
+    #        keeps the number of jobs and the time spent on them (busy time).         #
+    #                                                                                  #
+    # Input Arguments:                                                                 #
+    #        name     : Name of the stage                                              #
+    #        function : function(job, context), context is the object created by init #
+    #                   for every worker (e.g. a pdf converter), or None               #
+    #        workers  : Number of worker threads                                       #
+    #        init     : function() that creates the context of a worker, or None      #
+    #        done     : function(context) that releases the context, or None          #
+    ####################################################################################
+    """
+
+    def __init__(self, name, function, workers, init=None, done=None):
+        self.name = name
+        self.function = function
+        self.workers = workers
+        self.init = init
+        self.done = done
+        self.in_queue = None
+        self.out_queue = None
+        self.count = 0
+        self.busy = 0.0
+        self.lock = threading.Lock()
+        self.running = 0
+        self.threads = list()
+
+    def start(self, in_queue, out_queue):
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.running = self.workers
+        for i in range(self.workers):
+            thread = threading.Thread(target=self.work, name=self.name + str(i), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def work(self):
+        context = None
+        error = None
+        try:
+            if not (self.init is None):
+                # Without its context the worker still takes the jobs and fails
+                # them, otherwise the stages before it would wait forever
+                try:
+                    context = self.init()
+                except Exception as e:
+                    error = type(e).__name__ + ': ' + str(e)
+            while True:
+                job = self.in_queue.get()
+                if job is None:
+                    # Leave the end mark for the other workers of the stage
+                    self.in_queue.put(None)
+                    break
+                if job.status == 'ok' and not (error is None):
+                    job.status = 'failed'
+                    job.message = self.name + ': ' + error
+                elif job.status == 'ok':
+                    start = time.perf_counter()
+                    with WordTea.documentErrors() as failure:
+                        self.function(job, context)
+                    if not (failure.message is None):
+                        job.status = 'failed'
+                        job.message = self.name + ': ' + failure.message
+                    duration = time.perf_counter() - start
+                    job.times[self.name] = duration
+                    with self.lock:
+                        self.count += 1
+                        self.busy += duration
+                self.out_queue.put(job)
+        finally:
+            if not (self.done is None) and not (context is None):
+                self.done(context)
+            with self.lock:
+                self.running -= 1
+                last = (self.running == 0)
+            # The last worker passes the end mark to the next stage
+            if last:
+                self.out_queue.put(None)
+
+
+class documentPipeline:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        documentPipeline                                                          #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        The load -> xref -> save -> convert pipeline. The queues between the      #
+    #        stages hold at most depth documents, so a slow stage holds back the      #
+    #        stages before it instead of filling the memory with loaded documents.    #
+    #        The convert stage has its own number of workers, each one with its own   #
+    #        pdf converter.                                                            #
+    #                                                                                  #
+    # Input Arguments:                                                                 #
+    #        args       : The options of WordTea, see WordTea.addOptions               #
+    #        converters : Number of workers of the convert stage                       #
+    #        depth      : Size of the queues between the stages                        #
+    ####################################################################################
+    """
+
+    def __init__(self, args, converters=1, depth=2):
+        self.args = args
+        self.depth = depth
+        # The python stages share the interpreter, one worker each is enough
+        self.stages = [pipelineStage('load', self.load, 1),
+                       pipelineStage('xref', self.xref, 1),
+                       pipelineStage('save', self.save, 1),
+                       pipelineStage('convert', self.convert, converters, self.newConverter, self.closeConverter)]
+        self.wall = 0.0
+
+    # Functions of the stages
+    def load(self, job, context):
+        job.document = WordTea.loadDocument(job.in_file, self.args)
+
+    def xref(self, job, context):
+        # The stream engine writes the post-processed document here already
+        if self.args.engine == 'stream':
+            tmp_file = job.tempFile()
+        else:
+            tmp_file = job.tmp_file
+        job.document = WordTea.crossReference(job.document, job.in_file, tmp_file, self.args)
+
+    def save(self, job, context):
+        WordTea.saveDocument(job.document, job.tempFile())
+        # The document is not needed any more
+        job.document = None
+
+    def convert(self, job, context):
+        WordTea.convertDocument(context, job.tmp_file, job.out_file)
+
+    def newConverter(self):
+        return getConverter(self.args.pdf, self.args.soffice)
+
+    def closeConverter(self, converter):
+        converter.close()
+
+    def run(self, jobs):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        run                                                                       #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Processes the (input .docx, output .pdf, temporary .docx) jobs and       #
+        #        returns the pipelineJob of each one, in the order of the input.          #
+        ####################################################################################
+        """
+        start = time.perf_counter()
+        queues = [queue.Queue(maxsize=self.depth) for stage in self.stages]
+        # The last queue is only read by this function, no limit
+        queues.append(queue.Queue())
+        for i in range(len(self.stages)):
+            self.stages[i].start(queues[i], queues[i + 1])
+        items = [pipelineJob(in_file, out_file, tmp_file) for [in_file, out_file, tmp_file] in jobs]
+
+        # Feed the first stage from a thread, so the results are read at the same time
+        def feed():
+            for item in items:
+                queues[0].put(item)
+            queues[0].put(None)
+        feeder = threading.Thread(target=feed, name='feed', daemon=True)
+        feeder.start()
+        try:
+            while True:
+                job = queues[-1].get()
+                if job is None:
+                    break
+                job.end = time.perf_counter()
+                job.removeTemp()
+                log.log(PROCESS, "Process: %s %s", job.status, job.in_file)
+            feeder.join()
+        finally:
+            # An interrupted run leaves no temporary file behind
+            for item in items:
+                item.removeTemp()
+        self.wall = time.perf_counter() - start
+        return items
+
+    def stageReport(self):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        stageReport                                                               #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Returns the report of the stages of the last run as text. For every      #
+        #        stage: workers, documents, busy time, mean time per document, capacity   #
+        #        (documents per second the workers of the stage can handle) and the       #
+        #        utilisation of the workers. The stage with the highest utilisation is    #
+        #        the one that limits the pipeline.                                         #
+        ####################################################################################
+        """
+        rtn = "%-8s %7s %6s %9s %9s %10s %6s\n" % ("Stage", "Workers", "Docs", "Busy (s)", "Mean (s)", "Docs/s max", "Util")
+        for stage in self.stages:
+            if stage.count > 0:
+                mean = stage.busy / stage.count
+            else:
+                mean = 0.0
+            if mean > 0:
+                capacity = stage.workers / mean
+            else:
+                capacity = 0.0
+            if self.wall > 0:
+                util = stage.busy / (self.wall * stage.workers)
+            else:
+                util = 0.0
+            rtn += "%-8s %7d %6d %9.2f %9.3f %10.2f %5.0f%%\n" % (stage.name, stage.workers, stage.count, stage.busy, mean, capacity, util * 100)
+        rtn += "Wall time: %.2f s" % self.wall
+        return rtn
@@ -24,13 +24,9 @@
 #                                                                         #
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
 
-import re
-import comtypes.client
-import docx
-import UtilFunctions
-from UtilFunctions import *
-from docx import Document
-from docx.shared import Inches
+import stats
+from logSetup import log
+from UtilFunctions import formatSelect, entryStore
 
 
 class referenceList:
@@ -77,12 +73,11 @@ class referenceList:
         self.tag = tg
         self.label = lb
         self.style = st
-        self.counter = 0
-        self.count_list = list()
-        self.ref_list = list()
-        self.parent_count = list()
+        # Declared labels, their numbers, parent counters and referenced flags
+        self.entries = entryStore()
         self.oldParent = 0
-        self.checkList = list()
+        # Final reference text of each entry, created by buildTable
+        self.numberTable = None
         if pr is None:
             self.parent = None
         else:
@@ -92,177 +87,142 @@ class referenceList:
 ################################################################################################
 
 ################################################################################################
-# Begin : Build list function                                                                  #
+# Begin : Add label function                                                                   #
 ################################################################################################
 
-    def buildList(self, pr, v1, v2):
+    def addLabel(self, label, v1, v2):
         """
         ####################################################################################
         # Function:                                                                        #
-        #        buildList                                                                 #
+        #        addLabel                                                                  #
         #                                                                                  #
         # Description:                                                                     #
-        #        This function searches the input text for related labels. The labels are  #
-        #        related to the class variable label set during the creation of the class. #
+        #        Adds a declared label to the list and gives it the next number. The      #
+        #        numbering restarts every time the parent list gets a new entry.           #
         #                                                                                  #
         # Input Arguments:                                                                 #
-        #        pr      : Text to be searched for related labels                          #
+        #        label   : Declared label (the text between the brackets)                  #
         #        v1      : Verbose level 1                                                 #
         #        v2      : Verbose level 2                                                 #
         #                                                                                  #
         # Return Arguments:                                                                #
-        #        pr      : Function overwrites and returns the text with the label removed #
-        #                                                                                  #
+        #        rtn     : 1 if the label is added, 0 if it was already declared           #
         ####################################################################################
         """
-        if v2:
-            print('# Building list paragraph : \n'+pr.text)
-        # pr = text
-        txt_label = '^'+str(self.label)+'{'
-        error = False
-        if txt_label.lower() in pr.text.lower():
-            # Loop added to work with runs (strings with same style)
-            inline = pr.runs
-            for j in range(len(inline)):
-                found = False
+        tmp = label.strip().lower()
+        if tmp in self.entries:
+            log.warning("!!!WARNING!!! Label \"%s\" of list %s is declared more than once. Only the first declaration is used.", tmp, self.name)
+            return 0
+        if stats.active is not None:
+            stats.active.count('labels_declared')
+        self.numberTable = None
+        if not (self.parent is None):
+            parent = self.parent.counter
+            if self.counter == 0:
+                count = 1
                 if v2:
-                    print("Info: Class "+self.name+" is calling the match label function.")
-                [tmp_text, found] = Match_label(inline, j, self.label, found, v2, v1, error)
-                # Put text back to the inline
-                if ((not (txt_label.lower() in tmp_text.lower())) and found):
-                    print('##################!!!ERROR Debug Time!!!###########################')
-                    print("Label : \"" + txt_label + "\" not found in text \"" + tmp_text + "\". Text will be inserted back to the inline.")
-                    print("Inline text is : "+inline[j].text)
-                    found = False
-                    exit()
-                # If text is found put it in the list
-                if found:
-                    if v1:
-                        print("Info: Match label final text : " + tmp_text)
-                    if v2:
-                        print("Paragraph after : \n" + pr.text)
-                    start = r"\^\s*"
-                    end = r"\s*\{([^\}]+)\}\s*\^"
-                    tmp_list = FindLabelInText(tmp_text, self.label, start, end, v2, v1)
-                    # Store the low case label
-                    for tmp in tmp_list:
-                        self.ref_list.append(tmp)
-                        self.checkList.append(0)
-                        self.counter += 1
-                        if not (self.parent is None):
-                            self.parent_count.append(self.parent.counter)
-                            if self.counter-1 == 0:
-                                self.count_list.append(1)
-                                self.parent.printIndexList()
-                                self.oldParent = self.parent.getCurrentIndex()
-                            else:
-                                if self.oldParent == self.parent.getCurrentIndex():
-                                    temp_count = self.count_list[self.counter - 2] + 1
-                                    self.count_list.append(temp_count)
-                                else:
-                                    temp_count = 1
-                                    self.count_list.append(temp_count)
-                                    self.oldParent = self.parent.getCurrentIndex()
-                        else:
-                            self.count_list.append(self.counter)
-        if(len(self.count_list) != len(self.ref_list)):
-            print("Length of lists does not match!")
-            print(self.ref_list)
-            print(self.count_list)
-            exit()
+                    self.parent.printIndexList()
+            # Restart the numbering when a new parent is declared
+            elif self.oldParent == parent:
+                count = self.entries.counts[-1] + 1
+            else:
+                count = 1
+            self.oldParent = parent
+        else:
+            parent = 0
+            count = self.counter + 1
+        self.entries.add(tmp, count, parent)
         return 1
 
+    # Number of declared labels, the parent counter of the child lists
+    @property
+    def counter(self):
+        return len(self.entries)
+
 ################################################################################################
-# End : Build list function                                                                    #
+# End : Add label function                                                                     #
 ################################################################################################
 
 ################################################################################################
-# Begin : Match and replace function                                                           #
+# Begin : Get/Set state functions                                                              #
 ################################################################################################
 
-    def matchNreplace(self, pr, v1, v2):
+    def getState(self):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        getState                                                                  #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Returns a copy of the entries of the list, used by the label cache.      #
+        ####################################################################################
+        """
+        return self.entries.getState()
+
+    def setState(self, state, keep):
         """
         ####################################################################################
         # Function:                                                                        #
-        #        matchNreplace                                                             #
+        #        setState                                                                  #
         #                                                                                  #
         # Description:                                                                     #
-        #        This function searches the input text for related cross-references.       #
-        #        the cross-references are depended to the class variable tag set during    #
-        #        the creation of the class.                                                #
+        #        Restores the list to the first entries of a state from getState. The     #
+        #        result is the same as calling addLabel for these entries, so the next     #
+        #        addLabel calls continue the numbering.                                    #
         #                                                                                  #
         # Input Arguments:                                                                 #
-        #        pr      : Text to be searched for related tags                            #
-        #        v1      : Verbose level 1                                                 #
-        #        v2      : Verbose level 2                                                 #
+        #        state   : State returned by getState                                      #
+        #        keep    : Number of entries to keep                                       #
+        ####################################################################################
+        """
+        self.entries.setState(state, keep)
+        self.numberTable = None
+        # Parent counter seen by the last entry, see addLabel
+        if len(self.entries):
+            self.oldParent = self.entries.parents[-1]
+        else:
+            self.oldParent = 0
+        return 1
+
+################################################################################################
+# End : Get/Set state functions                                                                #
+################################################################################################
+
+################################################################################################
+# Begin : Resolve function                                                                     #
+################################################################################################
+
+    def resolve(self, label):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        resolve                                                                   #
         #                                                                                  #
-        # Return Arguments:                                                                #
-        #        pr      : Function overwrites and returns the text with the label removed #
+        # Description:                                                                     #
+        #        Returns the reference text of a label from the number table and marks    #
+        #        the label as referenced.                                                  #
         #                                                                                  #
-        # TODO : Better verbose                                                            #
+        # Input Arguments:                                                                 #
+        #        label   : Referenced label (the text between the brackets)                #
+        #                                                                                  #
+        # Return Arguments:                                                                #
+        #        txt     : Reference text, or None if the label is not declared            #
         ####################################################################################
         """
-        if v2:
-            print('# Searching references in paragraph : \n'+pr.text)
-        # pr = text
-        txt_label = '`'+str(self.tag)+'{'
-        error = False
-        if txt_label.lower() in pr.text.lower():
-            # Loop added to work with runs (strings with same style)
-            inline = pr.runs
-            for j in range(len(inline)):
-                found = False
-                [tmp_text, found] = Match_Tag(inline, j, self.label, found, v2, v1, error)
-                if ((not (txt_label.lower() in tmp_text)) and found):
-                    print('##################!!!ERROR Debug Time!!!###########################')
-                    print("Label : \"" + txt_label + "\" not found in text \"" + tmp_text + "\". ")
-                    print("Inline text is : "+inline[j].text)
-                    found = False
-                    exit()
-                # If text is found input the right number
-                if found:
-                    if v1:
-                        print("Info: Match Tag final text : " + tmp_text)
-                    if v2:
-                        print("Paragraph after removal : \n" + pr.text)
-                    tagInList = False
-                    start = r"`\s*"
-                    end = r"\s*\{([^\}]+)\}\s*`"
-                    tmp_list = FindLabelInText(tmp_text, self.label, start, end, v2, v1)
-                    for tmp in tmp_list:
-                        for i in range(len(self.ref_list)):
-                            if str(self.ref_list[i]).lower() in tmp.lower():
-                                tagInList = True
-                                self.checkList[i] = 1
-                                if (self.parent is None):
-                                    txt = formatSelect(self.count_list[i], self.style)
-                                else:
-                                    txt = self.parrentHier(i, v2)
-                                    txt += formatSelect(self.count_list[i], self.style)
-                                toReplace = start + self.label + r"\s*\{\s*" + self.ref_list[i].lower() + r"\s*\}\s*`"
-                                if v2:
-                                    print("INFO: tag found : ")
-                                    print(re.findall(toReplace, inline[j].text.lower()))
-                                inline[j].text = re.sub(toReplace, txt, inline[j].text.lower())
-                                print(pr.text)
-                                # exit()
-                    if not tagInList:
-                        print("############################################!!!WARNING!!!######################################################")
-                        print("#Tag or label not found in the list. Either wrong tag or wrong label was used! Check the following paragraph: #\n" + pr.text)
-                        print("############################################!!!WARNING!!!######################################################")
-                        print("############################################!!!WARNING!!!######################################################")
-                        print("#Labels Found  :                                                                                              #")
-                        print(tmp_text)
-                        print("#Labels in list:                                                                                              #")
-                        print(self.ref_list)
-                        print("############################################!!!WARNING!!!######################################################")
-                    else:
-                        if v2:
-                            print("Paragraph after replace : \n" + pr.text)
-        return 1
+        entry = self.getEntry(label)
+        if entry is None:
+            if stats.active is not None:
+                stats.active.count('labels_unresolved')
+            return None
+        if self.numberTable is None:
+            self.buildTable(False)
+        if stats.active is not None:
+            stats.active.count('labels_resolved')
+        self.entries.mark(entry[0])
+        return self.numberTable[entry[0]]
 
 ################################################################################################
-# End : Match and replace function                                                             #
+# End : Resolve function                                                                       #
 ################################################################################################
 
 ################################################################################################
@@ -281,19 +241,54 @@ class referenceList:
 ################################################################################################
 
     def getParent_count(self):
-        return self.parent_count
+        return self.entries.parents
 
 ################################################################################################
 # End : Get parent count                                                                       #
 ################################################################################################
 
+################################################################################################
+# Begin : Get entry                                                                            #
+################################################################################################
+
+    def getEntry(self, label):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        getEntry                                                                  #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Looks up a label in the index of the list. Only exact (case insensitive)  #
+        #        matches are returned, e.g. fig1 does not match fig10.                     #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        label   : Label to look up                                                #
+        #                                                                                  #
+        # Return Arguments:                                                                #
+        #        rtn     : [position, count, parent count, check flag] of the label, or    #
+        #                  None if the label is not declared                               #
+        ####################################################################################
+        """
+        i = self.entries.find(label.strip().lower())
+        if i is None:
+            return None
+        if self.parent is None:
+            parent = None
+        else:
+            parent = self.entries.parents[i]
+        return [i, self.entries.counts[i], parent, self.entries.checks[i]]
+
+################################################################################################
+# End : Get entry                                                                              #
+################################################################################################
+
 ################################################################################################
 # Begin : Get current index                                                                    #
 ################################################################################################
 
     def getCurrentIndex(self):
         if(self.counter != 0):
-            ret = self.count_list[self.counter-1]
+            ret = self.entries.counts[-1]
         else:
             ret = -1
         return ret
@@ -307,8 +302,7 @@ class referenceList:
 ################################################################################################
 
     def printList(self):
-        print("Reference list of " + self.name)
-        print(self.ref_list)
+        log.info("Reference list of %s\n%s", self.name, self.entries.labels)
         return 1
 
 ################################################################################################
@@ -320,8 +314,7 @@ class referenceList:
 ################################################################################################
 
     def printIndexList(self):
-        print("Index list of " + self.name)
-        print(self.count_list)
+        log.info("Index list of %s\n%s", self.name, self.entries.counts.tolist())
         return 1
 
 ################################################################################################
@@ -335,11 +328,10 @@ class referenceList:
     def printParentList(self):
         rtn = 0
         if not(self.parent is None):
-            print("Parent list of " + self.name)
-            print(self.parent_count)
+            log.info("Parent list of %s\n%s", self.name, self.entries.parents.tolist())
             rtn = 1
         else:
-            print("No parent for " + self.name + "!")
+            log.info("No parent for %s!", self.name)
             rtn = 0
         return rtn
 
@@ -370,32 +362,48 @@ class referenceList:
 ################################################################################################
 
 ################################################################################################
-# Begin : Search and find parrent hierarchy                                                    #
+# Begin : Build number table                                                                   #
 ################################################################################################
 
-    def parrentHier(self, i, v2):
-        rtn = ''
-        if not (self.parent is None):
-            #print("Parent Count of class " + self.name + " is : " + str(self.parent_count[i]))
-            # self.parent.printIndexList()
-            #print("Parent index for this count is : "+str(self.parent.count_list[self.parent_count[i]-1]))
-            parent_text = self.parent.parrentHier((self.parent_count[i] - 1), v2)
-            #print("Parent text in class " + self.name + " is " + parent_text)
-            #temp_self_list = self.count_list[i]
-            #temporaryText = formatSelect(temp_self_list, self.style)
-            #print("Temporary text in class " + self.name + " is " + temporaryText)
-            rtn = parent_text + '.'
+    def buildTable(self, v2):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        buildTable                                                                #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Creates the final reference text of every entry of the list, including   #
+        #        the numbers of the parent lists (e.g. 2.1.3 for sec3). The table of the   #
+        #        parent is built first. Must be called after the build phase, the replace #
+        #        phase only looks up the table.                                            #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        v2      : Verbose level 2                                                 #
+        #                                                                                  #
+        # Return Arguments:                                                                #
+        #        numberTable : Tuple with the reference text of each entry                 #
+        ####################################################################################
+        """
+        if self.parent is None:
+            table = [formatSelect(count, self.style) for count in self.entries.counts]
         else:
-            if v2:
-                print("No parent in class : " + self.name + ".")
-            temp_self_list = self.count_list[i]
-            rtn = formatSelect(temp_self_list, self.style)
+            if self.parent.numberTable is None:
+                self.parent.buildTable(v2)
+            parentTable = self.parent.numberTable
+            table = list()
+            for count, parent in zip(self.entries.counts, self.entries.parents):
+                txt = formatSelect(count, self.style)
+                # Entries declared before any parent have no parent number
+                if parent > 0:
+                    txt = parentTable[parent - 1] + '.' + txt
+                table.append(txt)
+        self.numberTable = tuple(table)
         if v2:
-            print("Text to be returned from the call is : "+rtn)
-        return rtn
+            log.debug("Number table of %s :\n%s", self.name, self.numberTable)
+        return self.numberTable
 
 ################################################################################################
-# End : Search and find parrent hierarchy                                                      #
+# End : Build number table                                                                     #
 ################################################################################################
 
 ################################################################################################
@@ -403,11 +411,8 @@ class referenceList:
 ################################################################################################
 
     def checkRefList(self):
-        for i in range(len(self.ref_list)):
-            if (self.checkList[i] == 0):
-                print("##################!!!Warning!!!##################")
-                print("# Label \""+str(self.ref_list[i])+"\" of list "+self.name+"\n"+"# Is not referenced anywhere in the text.")
-                print("#################################################")
+        for label in self.entries.unreferenced():
+            log.warning("##################!!!Warning!!!##################\n# Label \"%s\" of list %s\n# Is not referenced anywhere in the text.\n#################################################", label, self.name)
         return 1
 
 ################################################################################################
@@ -0,0 +1,151 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+# Run statistics, enabled with the --stats option. The collector is global to
+# the process: the functions of the tool check stats.active and only count
+# when it is set, so the counting costs nothing when it is not used.
+
+import sys
+import json
+import time
+import platform
+import contextlib
+import tracemalloc
+
+# Collector of the current run, None when the statistics are disabled
+active = None
+
+# Counters of the report, in this order
+counterNames = ['paragraphs', 'runs', 'regex', 'labels_declared', 'labels_resolved',
+                'labels_unresolved', 'runs_rewritten', 'cache_reused', 'cache_scanned']
+phaseNames = ['open', 'build', 'check', 'replace', 'save', 'convert']
+
+
+class runStats:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        runStats                                                                  #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Keeps the wall time of the phases of a run and the counters of the work  #
+    #        done (paragraphs and runs visited, regular expression evaluations,       #
+    #        labels resolved, runs rewritten) and the peak resident memory of the      #
+    #        process. With trace the peak of the Python allocations is also traced     #
+    #        with tracemalloc, that makes the run a few times slower.                  #
+    ####################################################################################
+    """
+
+    def __init__(self, trace=False):
+        self.phases = dict()
+        self.counters = dict((name, 0) for name in counterNames)
+        self.info = dict()
+        self.start = time.perf_counter()
+        self.total = None
+        self.peak = None
+        # Only stopped at the end if started here
+        self.traced = trace
+        self.trace = trace and not tracemalloc.is_tracing()
+        if self.trace:
+            tracemalloc.start()
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def addTime(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def stop(self):
+        self.total = time.perf_counter() - self.start
+        if self.traced:
+            self.peak = tracemalloc.get_traced_memory()[1]
+        if self.trace:
+            tracemalloc.stop()
+        return 1
+
+    def report(self):
+        phases = dict((name, round(self.phases[name], 6)) for name in phaseNames if name in self.phases)
+        for name in self.phases:
+            if name not in phases:
+                phases[name] = round(self.phases[name], 6)
+        memory = dict()
+        if self.traced:
+            memory['peak_traced_bytes'] = self.peak
+        # Peak resident memory of the process, not available on Windows
+        try:
+            import resource
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # Kilobytes on Linux, bytes on macOS
+            memory['max_rss_bytes'] = rss if sys.platform == 'darwin' else rss * 1024
+        except ImportError:
+            pass
+        rtn = dict(self.info)
+        rtn.update({'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'total_time': round(self.total, 6) if not (self.total is None) else None,
+                    'phases': phases,
+                    'counters': dict(self.counters),
+                    'memory': memory})
+        return rtn
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        return 1
+
+
+# Function that enables the statistics, returns the collector. The Python
+# allocations are only traced with trace, see runStats
+def start(trace=False):
+    global active
+    active = runStats(trace)
+    return active
+
+
+# Function that disables the statistics, returns the stopped collector
+def stop():
+    global active
+    rtn = active
+    active = None
+    if not (rtn is None):
+        rtn.stop()
+    return rtn
+
+
+# Context manager that adds the wall time of a block to a phase
+@contextlib.contextmanager
+def phase(name):
+    if active is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        # The collector may have been stopped inside the block
+        if not (active is None):
+            active.addTime(name, time.perf_counter() - start)
@@ -0,0 +1,155 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+# Iterator over all the paragraphs of a document. Word keeps text in several
+# stories: the body (with the paragraphs of the tables, also nested ones, and
+# of the text boxes), and the headers and footers of every section. The
+# paragraphs of a story are found with one pass over its xml, in document
+# order, so adding the tables and the text boxes does not add loops.
+
+import re
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+MC = '{http://schemas.openxmlformats.org/markup-compatibility/2006}'
+XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+# Parts of the headers and the footers, e.g. word/header1.xml
+STORY_XML = re.compile(r'/?word/(header|footer)(\d*)\.xml$')
+
+
+# Function that yields (w:p element, copy) for the paragraphs of an xml
+# element (itself included), in document order. Text boxes are saved twice by
+# Word, in mc:Choice and in mc:Fallback for older versions, copy is True for
+# the paragraphs of the mc:Fallback copy.
+def storyItems(root):
+    copies = None
+    for elem in root.iter(W + 'p', MC + 'Fallback'):
+        if elem.tag == MC + 'Fallback':
+            if copies is None:
+                copies = set()
+            copies.update(elem.iter(W + 'p'))
+        else:
+            yield (elem, not (copies is None) and elem in copies)
+
+
+# Function that yields the w:p elements of an xml element, see storyItems.
+# The labels are declared from the mc:Choice copy only, the mc:Fallback copy
+# is returned with fallback, for the removal of the labels and the tags.
+def storyParagraphs(root, fallback=False):
+    for p, copy in storyItems(root):
+        if fallback or not copy:
+            yield p
+
+
+# Function that returns the w:t elements of a paragraph, without the ones of
+# the paragraphs inside it (e.g. text boxes)
+def paragraphRuns(p):
+    rtn = list()
+    for t in p.iter(W + 't'):
+        parent = t.getparent()
+        while parent.tag != W + 'p':
+            parent = parent.getparent()
+        if parent is p:
+            rtn.append(t)
+    return rtn
+
+
+# Children of a w:r that are part of its text, see runText
+RUN_TEXT = frozenset(W + tag for tag in ('t', 'tab', 'ptab', 'br', 'cr', 'noBreakHyphen'))
+
+
+# Function that returns the text of the runs of a python-docx paragraph, the
+# text the docx engine scans (runBuffer(pr.runs).text), read without the xpath
+# of Run.text. The runs of a w:hyperlink are not part of it, as in pr.runs.
+def runText(pr):
+    return ''.join(str(e) for r in pr._p.r_lst for e in r if e.tag in RUN_TEXT)
+
+
+# Function that returns the sort key of a header or footer part name, the
+# headers first and then the footers, in the order of their numbers
+def storyOrder(name):
+    m = STORY_XML.match(name)
+    return (m.group(1) == 'footer', int(m.group(2) or 0), name)
+
+
+# Function that returns the headers and footers of a document, every part
+# once (sections can share them), see storyOrder
+def headerFooters(document):
+    rtn = list()
+    parts = set()
+    for section in document.sections:
+        for item in (section.first_page_header, section.header, section.even_page_header,
+                     section.first_page_footer, section.footer, section.even_page_footer):
+            # A linked header has no part of its own, it is the one of a previous section
+            if item.is_linked_to_previous:
+                continue
+            part = item.part
+            if id(part) in parts:
+                continue
+            parts.add(id(part))
+            rtn.append(item)
+    return sorted(rtn, key=lambda item: storyOrder(str(item.part.partname)))
+
+
+def iterParagraphs(document, fallback=False):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        iterParagraphs                                                            #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Yields every paragraph of the document exactly once: the body first      #
+    #        (including the tables and the text boxes) and then the headers and the   #
+    #        footers. Used by the build and the replace phase, so both see the same    #
+    #        paragraphs in the same order.                                             #
+    #                                                                                  #
+    # Input Arguments:                                                                 #
+    #        document : python-docx Document                                           #
+    #        fallback : Also yield the mc:Fallback copies of the text boxes            #
+    #                                                                                  #
+    # Return Arguments:                                                                #
+    #        Paragraph objects                                                         #
+    ####################################################################################
+    """
+    # Imported here, the stream engine does not need python-docx
+    from docx.text.paragraph import Paragraph
+    for p in storyParagraphs(document.element.body, fallback):
+        yield Paragraph(p, document)
+    for item in headerFooters(document):
+        for p in storyParagraphs(item.part.element, fallback):
+            yield Paragraph(p, item)
+
+
+# Function that yields the paragraphs of the mc:Fallback copies of the text
+# boxes of a document, see iterParagraphs
+def fallbackParagraphs(document):
+    from docx.text.paragraph import Paragraph
+    for p, copy in storyItems(document.element.body):
+        if copy:
+            yield Paragraph(p, document)
+    for item in headerFooters(document):
+        for p, copy in storyItems(item.part.element):
+            if copy:
+                yield Paragraph(p, item)
@@ -0,0 +1,345 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+# Streaming engine, works directly on the word/document.xml of the .docx file
+# instead of the python-docx objects. The body is parsed incrementally and
+# every block (paragraph, table, etc.) is dropped as soon as it is processed,
+# so the memory does not depend on the size of the document.
+
+import shutil
+import zipfile
+from lxml import etree
+import stats
+from logSetup import log
+from storyIterator import storyItems, storyParagraphs, storyOrder, paragraphRuns, STORY_XML, XML_SPACE
+from bibtex import BIB_MARKER, expandMarker, bibliographyLines
+
+# Namespace of the word document xml
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+DOCUMENT_XML = 'word/document.xml'
+
+
+# Function that parses the document xml and yields its blocks. The events are:
+#   ('start', element) : start of w:document and w:body, without children
+#   ('block', element) : complete child of w:body, or other child of w:document
+#   ('end', element)   : end of w:body and w:document
+# The blocks are cleared after they are handed out.
+
+
+def iterBlocks(stream):
+    depth = 0
+    in_body = False
+    for event, elem in etree.iterparse(stream, events=('start', 'end'), huge_tree=True):
+        if event == 'start':
+            depth += 1
+            if depth == 1 or (depth == 2 and elem.tag == W + 'body'):
+                in_body = (depth == 2)
+                yield ('start', elem)
+        else:
+            if (depth == 3 and in_body) or (depth == 2 and elem.tag != W + 'body'):
+                yield ('block', elem)
+                # Free the block and the blocks before it
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+            elif depth <= 2:
+                if depth == 2:
+                    in_body = False
+                yield ('end', elem)
+            depth -= 1
+
+
+# Function that returns the names of the header and footer parts of a .docx
+# file, see storyOrder
+def storyParts(zin):
+    return sorted([name for name in zin.namelist() if STORY_XML.match(name)], key=storyOrder)
+
+
+class streamEngine:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        streamEngine                                                              #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Alternative to the python-docx loops of WordTea.py for very large          #
+    #        documents. The first streaming pass over word/document.xml builds the     #
+    #        reference lists of the scanner, the second one writes the document with  #
+    #        the labels removed and the tags replaced. All the other parts of the      #
+    #        .docx file are copied as they are.                                        #
+    ####################################################################################
+    """
+
+    ################################################################################################
+    # Begin : Constructor                                                                          #
+    ################################################################################################
+    def __init__(self, scanner, v1, v2):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        streamEngine constractor                                                  #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        scanner : labelScanner with the reference lists                           #
+        #        v1      : Verbose level 1                                                 #
+        #        v2      : Verbose level 2                                                 #
+        ####################################################################################
+        """
+        self.scanner = scanner
+        self.v1 = v1
+        self.v2 = v2
+        # Namespace declarations of the w:document element, see stripDeclarations
+        self.declarations = list()
+        # Lines of the reference list, created at the first ^bibliography^ marker
+        self.bibLines = None
+        # (part, paragraph number) of the paragraphs recorded by the build phase,
+        # see labelScanner.markLocation, None to visit all the paragraphs
+        self.marked = None
+################################################################################################
+# End : Constructor                                                                            #
+################################################################################################
+
+################################################################################################
+# Begin : Build list function                                                                  #
+################################################################################################
+
+    def buildList(self, in_file, cache=None):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        buildList                                                                 #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        First pass, adds the declared labels of the document to the reference    #
+        #        lists and builds the number tables. The body is streamed, the headers    #
+        #        and the footers (small parts) are parsed after it. The paragraphs are    #
+        #        numbered in every part, the numbers of the paragraphs with tags are       #
+        #        recorded in the scanner for the second pass.                              #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        in_file : Path to the input .docx file                                    #
+        #        cache   : Optional labelCache, used instead of the scanner                #
+        ####################################################################################
+        """
+        with zipfile.ZipFile(in_file) as zin:
+            number = 0
+            with zin.open(DOCUMENT_XML) as stream:
+                for event, elem in iterBlocks(stream):
+                    if event == 'block':
+                        for p, copy in storyItems(elem):
+                            number += 1
+                            self.scanParagraph(p, cache, (DOCUMENT_XML, number), copy)
+            for name in storyParts(zin):
+                with zin.open(name) as stream:
+                    for number, [p, copy] in enumerate(storyItems(etree.parse(stream).getroot()), 1):
+                        self.scanParagraph(p, cache, (name, number), copy)
+        if cache is not None:
+            cache.finish()
+        else:
+            self.scanner.buildTables(self.v2)
+        return 1
+
+    # Adds the labels of one w:p element to the lists (or gives the text to the
+    # cache). The mc:Fallback copies (copy) are only recorded for the replace
+    def scanParagraph(self, p, cache, location, copy=False):
+        runs = paragraphRuns(p)
+        text = ''.join(t.text or '' for t in runs)
+        if stats.active is not None:
+            stats.active.count('paragraphs')
+            stats.active.count('runs', len(runs))
+        if copy:
+            self.scanner.markCopy(location, text)
+            return 1
+        if cache is not None:
+            self.scanner.markLocation(location, cache.addParagraph(text), text)
+            return 1
+        hits = self.scanner.scan(text)
+        self.scanner.markLocation(location, hits, text)
+        for hit in hits:
+            if hit[0] == '^' and self.v2:
+                log.debug("Info: Stream engine found label %s for kind %s.", hit[2], hit[1])
+            self.scanner.declare(hit[0], hit[1], hit[2], self.v1, self.v2)
+        return 1
+
+################################################################################################
+# End : Build list function                                                                    #
+################################################################################################
+
+################################################################################################
+# Begin : Match and replace function                                                           #
+################################################################################################
+
+    def matchNreplace(self, in_file, out_file):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        matchNreplace                                                             #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Second pass, writes the .docx file with the labels removed and the tags  #
+        #        replaced by the reference text. Must be called after buildList.          #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        in_file  : Path to the input .docx file                                   #
+        #        out_file : Path to the output .docx file                                  #
+        ####################################################################################
+        """
+        if self.scanner.locations is not None:
+            self.marked = set(self.scanner.locations)
+        with zipfile.ZipFile(in_file) as zin, zipfile.ZipFile(out_file, 'w', zipfile.ZIP_DEFLATED) as zout:
+            for item in zin.infolist():
+                # Sizes are not known before writing, zip64 only for the very large parts
+                with zin.open(item) as src, zout.open(item, 'w', force_zip64=(item.file_size > 0x7FFFFFFF)) as dst:
+                    if item.filename == DOCUMENT_XML:
+                        self.writeDocument(src, dst)
+                    elif STORY_XML.match(item.filename):
+                        root = etree.parse(src).getroot()
+                        for number, p in enumerate(list(storyParagraphs(root, fallback=True)), 1):
+                            self.insertAfter(p, self.replaceParagraph(p, (item.filename, number)))
+                        dst.write(etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True))
+                    else:
+                        shutil.copyfileobj(src, dst)
+        return 1
+
+################################################################################################
+# End : Match and replace function                                                             #
+################################################################################################
+
+################################################################################################
+# Begin : Write document function                                                              #
+################################################################################################
+
+    def writeDocument(self, src, dst):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        writeDocument                                                             #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Streams the document xml from src to dst, replacing the labels and tags  #
+        #        of the body paragraphs on the way.                                        #
+        ####################################################################################
+        """
+        dst.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\r\n')
+        number = 0
+        for event, elem in iterBlocks(src):
+            if event == 'start':
+                if elem.getparent() is None:
+                    self.declarations = list()
+                    for prefix, uri in elem.nsmap.items():
+                        if prefix is None:
+                            self.declarations.append(('xmlns="' + uri + '"').encode('utf-8'))
+                        else:
+                            self.declarations.append(('xmlns:' + prefix + '="' + uri + '"').encode('utf-8'))
+                # Write the start tag only, with the namespaces of the original element
+                shallow = etree.Element(elem.tag, attrib=dict(elem.attrib), nsmap=elem.nsmap)
+                tag = etree.tostring(shallow, encoding='UTF-8')
+                if elem.getparent() is not None:
+                    tag = self.stripDeclarations(tag)
+                dst.write(tag[:-2] + b'>')
+            elif event == 'block':
+                after = list()
+                for p in list(storyParagraphs(elem, fallback=True)):
+                    number += 1
+                    extra = self.replaceParagraph(p, (DOCUMENT_XML, number))
+                    # Paragraphs added after a block are written after it
+                    if p is elem:
+                        after = extra
+                    else:
+                        self.insertAfter(p, extra)
+                for q in [elem] + after:
+                    dst.write(self.stripDeclarations(etree.tostring(q, encoding='UTF-8')))
+            else:
+                dst.write(b'</' + self.qualifiedName(elem).encode('utf-8') + b'>')
+        return 1
+
+    # Removes the namespace declarations that are already on w:document from the
+    # first tag of a serialized element
+    def stripDeclarations(self, data):
+        end = data.index(b'>')
+        head = data[:end]
+        for declaration in self.declarations:
+            head = head.replace(b' ' + declaration, b'', 1)
+        return head + data[end:]
+
+    # Returns the prefixed name of an element, e.g. w:body
+    def qualifiedName(self, elem):
+        name = etree.QName(elem).localname
+        if elem.prefix is None:
+            return name
+        return elem.prefix + ':' + name
+
+################################################################################################
+# End : Write document function                                                                #
+################################################################################################
+
+################################################################################################
+# Begin : Replace paragraph function                                                           #
+################################################################################################
+
+    def replaceParagraph(self, p, location):
+        """
+        ####################################################################################
+        # Function:                                                                        #
+        #        replaceParagraph                                                          #
+        #                                                                                  #
+        # Description:                                                                     #
+        #        Removes the labels and replaces the tags of one w:p element. Only the    #
+        #        w:t elements that overlap a label or a tag are changed. A              #
+        #        ^bibliography^ paragraph gets the first line of the reference list.     #
+        #        The paragraphs that the build phase did not record are skipped.          #
+        #                                                                                  #
+        # Input Arguments:                                                                 #
+        #        p        : The w:p element                                                #
+        #        location : (part, paragraph number) of p, see buildList                  #
+        #                                                                                  #
+        # Return Arguments:                                                                #
+        #        extra   : The w:p elements of the other lines, to be placed after p       #
+        ####################################################################################
+        """
+        if self.marked is not None and location not in self.marked:
+            return list()
+        runs = paragraphRuns(p)
+        for t in self.scanner.replaceRuns(runs, self.v1, self.v2):
+            # Word drops the leading and trailing spaces of a w:t without it
+            if t.text != t.text.strip():
+                t.set(XML_SPACE, 'preserve')
+        if self.scanner.bibliographies and BIB_MARKER.search(''.join(t.text or '' for t in runs)):
+            if self.bibLines is None:
+                self.bibLines = bibliographyLines(self.scanner)
+            return expandMarker(p, self.bibLines)
+        return list()
+
+    # Places the elements of extra after p, in order
+    def insertAfter(self, p, extra):
+        for q in extra:
+            p.addnext(q)
+            p = q
+        return 1
+
+################################################################################################
+# End : Replace paragraph function                                                             #
+################################################################################################
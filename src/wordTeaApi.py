@@ -0,0 +1,202 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+# Library API of WordTea, for programs that process documents in their own
+# process (e.g. a document service with long-lived workers) instead of
+# running the command line for every document:
+#
+#   from wordTeaApi import process
+#   document, result = process('thesis.docx', bib='refs.bib')
+#   document.save('thesis_out.docx')
+#   print(result.labels['fig'], result.warnings, result.timings)
+#
+# The document is processed in memory with the docx engine, no file is
+# written and no pdf is created. Errors are raised as exceptions.
+
+import io
+import os
+import time
+import logging
+import argparse
+import threading
+import docx
+import docx.document
+import WordTea
+from logSetup import log
+
+
+class processResult:
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        processResult                                                             #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Result of process, besides the document:                                  #
+    #          labels     : kind -> {label: reference text}, in numbering order        #
+    #          warnings   : The warning messages of the run (missing labels etc.)     #
+    #          unresolved : (tags, paragraph text) of the paragraphs with tags that   #
+    #                       are not resolved                                           #
+    #          timings    : phase (open, build, replace) -> time in seconds           #
+    ####################################################################################
+    """
+
+    def __init__(self):
+        self.labels = dict()
+        self.warnings = list()
+        self.unresolved = list()
+        self.timings = dict()
+
+    # Returns the result as a dictionary, ready for json.dump
+    def toDict(self):
+        return {'labels': self.labels,
+                'warnings': self.warnings,
+                'unresolved': [{'tags': tags, 'text': text} for tags, text in self.unresolved],
+                'timings': self.timings}
+
+
+class warningCollector(logging.Handler):
+    """
+    ####################################################################################
+    # Class:                                                                           #
+    #        warningCollector                                                          #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Log handler that keeps the warnings of the thread that created it, so    #
+    #        calls of process in other threads do not mix their warnings.             #
+    ####################################################################################
+    """
+
+    def __init__(self, messages):
+        logging.Handler.__init__(self, logging.WARNING)
+        self.thread = threading.get_ident()
+        self.messages = messages
+
+    def emit(self, record):
+        if record.thread == self.thread:
+            self.messages.append(record.getMessage())
+
+
+###############################################################
+# Options #####################################################
+###############################################################
+def options(**kwargs):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        options                                                                   #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Returns the options of the command line (see WordTea.addOptions) with    #
+    #        their default values, changed by kwargs (e.g. s1=2, r='refs.bib').        #
+    #        Raises ValueError for an unknown option or a wrong value.                 #
+    ####################################################################################
+    """
+    args = WordTea.addOptions(argparse.ArgumentParser()).parse_args([])
+    for name, value in kwargs.items():
+        if not hasattr(args, name):
+            raise ValueError("Unknown option " + name)
+        setattr(args, name, value)
+    WordTea.checkOptions(args)
+    return args
+
+
+###############################################################
+# Open the source document ####################################
+###############################################################
+def openDocument(source):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        openDocument                                                              #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Returns the python-docx Document of the source: a Document (returned as  #
+    #        it is), a path, the bytes of a .docx file or a binary file object.        #
+    ####################################################################################
+    """
+    if isinstance(source, docx.document.Document):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return docx.Document(io.BytesIO(source))
+    if isinstance(source, (str, os.PathLike)):
+        if not os.path.isfile(source):
+            raise FileNotFoundError("Input file " + os.fspath(source) + " not found")
+        # Reading the document in memory, the input file is not touched again
+        with open(source, 'rb') as f:
+            return docx.Document(io.BytesIO(f.read()))
+    if hasattr(source, 'read'):
+        return docx.Document(source)
+    raise TypeError("Expected a Document, a path, bytes or a file object, got %s" % type(source))
+
+
+###############################################################
+# Process a document ##########################################
+###############################################################
+def process(source, bib=None, **kwargs):
+    """
+    ####################################################################################
+    # Function:                                                                        #
+    #        process                                                                   #
+    #                                                                                  #
+    # Description:                                                                     #
+    #        Creates the references of a document: removes the labels, replaces the   #
+    #        tags and inserts the reference list of the bibliography. A Document       #
+    #        source is changed in place.                                               #
+    #                                                                                  #
+    # Input Arguments:                                                                 #
+    #        source  : Document, path, bytes or binary file object, see openDocument  #
+    #        bib     : Path to a BibTeX file, optional                                 #
+    #        kwargs  : Other options of the command line, e.g. s1=2, see options       #
+    #                                                                                  #
+    # Return Arguments:                                                                #
+    #        [document, result] : The processed Document and its processResult        #
+    ####################################################################################
+    """
+    args = options(r=bib, **kwargs)
+    # In memory only, see the module description
+    args.engine = 'docx'
+    args.cache = None
+    result = processResult()
+    collector = warningCollector(result.warnings)
+    log.addHandler(collector)
+    try:
+        start = time.perf_counter()
+        document = openDocument(source)
+        result.timings['open'] = time.perf_counter() - start
+        scanner = WordTea.createScanner(args)
+        start = time.perf_counter()
+        WordTea.buildReferences(document, None, scanner, args)
+        result.timings['build'] = time.perf_counter() - start
+        start = time.perf_counter()
+        WordTea.replaceReferences(document, None, None, scanner, args)
+        result.timings['replace'] = time.perf_counter() - start
+    finally:
+        log.removeHandler(collector)
+    for kind, lst in scanner.kinds.items():
+        result.labels[kind] = dict(zip(lst.entries.labels, lst.numberTable))
+    result.unresolved = scanner.unresolved
+    return [document, result]
@@ -0,0 +1,123 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+
+# Shared fixtures of the tests. The documents are built with python-docx when
+# a test asks for them, so no binary fixture is kept in the repository.
+#
+# Run from the repository root:
+#   $ python -m pytest -q test
+
+import os
+import sys
+import zipfile
+import pytest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from docx import Document
+from lxml import etree
+from wordTeaApi import options
+import WordTea
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+# Text box of the Word 2010 format: the mc:Choice copy for Word and the
+# mc:Fallback (VML) copy for the older readers, both with the same text
+TEXT_BOX = ('<w:r xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+            'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+            'xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape" '
+            'xmlns:v="urn:schemas-microsoft-com:vml"><mc:AlternateContent>'
+            '<mc:Choice Requires="wps"><w:drawing><wps:txbx><w:txbxContent>'
+            '<w:p><w:r><w:t xml:space="preserve">%s</w:t></w:r></w:p>'
+            '</w:txbxContent></wps:txbx></w:drawing></mc:Choice>'
+            '<mc:Fallback><w:pict><v:textbox><w:txbxContent>'
+            '<w:p><w:r><w:t xml:space="preserve">%s</w:t></w:r></w:p>'
+            '</w:txbxContent></v:textbox></w:pict></mc:Fallback>'
+            '</mc:AlternateContent></w:r>')
+
+
+# Document with labels and tags in the body, a table, a nested table, the
+# header, the footer and a text box, some of them split in many runs
+@pytest.fixture
+def storyDocument(tmp_path):
+    document = Document()
+    document.sections[0].header.paragraphs[0].text = 'Header `fig{f2}` ^eq{e1}^'
+    document.sections[0].footer.paragraphs[0].text = 'Footer `eq{e1}`'
+    document.add_paragraph('Body ^fig{f1}^ see `fig{f2}` and `tbl{t1}`')
+    split = document.add_paragraph('Split ')
+    for text in ['^fi', 'g{f', '4}^ and `fig', '{f1}', '` end']:
+        split.add_run(text)
+    table = document.add_table(rows=1, cols=2)
+    table.cell(0, 0).paragraphs[0].text = 'Cell ^fig{f2}^'
+    inner = table.cell(0, 1).add_table(rows=1, cols=1)
+    inner.cell(0, 0).paragraphs[0].text = 'Nested ^tbl{t1}^ `fig{f1}`'
+    holder = document.add_paragraph('Box holder ')
+    box = 'Box ^fig{f3}^ `fig{f3}`'
+    holder._p.append(etree.fromstring(TEXT_BOX % (box, box)))
+    document.add_paragraph('End `fig{f3}` `fig{f4}` `sec1{none}`')
+    path = str(tmp_path / 'story.docx')
+    document.save(path)
+    return path
+
+
+# BibTeX file with a @string macro, LaTeX accents, a () entry and an entry
+# that is never cited
+BIBTEX = """@string{ieee = "IEEE Trans."}
+@Article{Stathis2020,
+  author = {Dimitrios Stathis and M{\\"u}ller, Hans-Peter},
+  title = {On {SiLago} --- fabrics},
+  journal = ieee # " on CAD", volume = 39, number = {4}, pages = {100--110}, month = mar, year = 2020,
+}
+@inproceedings(k2, author="A. B. C and D E", title="X", booktitle={Proc. {DATE}}, year={2019})
+@misc{unused, title={never cited}}
+"""
+
+
+@pytest.fixture
+def bibFile(tmp_path):
+    path = str(tmp_path / 'refs.bib')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(BIBTEX)
+    return path
+
+
+# Function that processes a document with the options of kwargs and returns
+# the post-processed .docx file
+def process(in_file, tmp_file, **kwargs):
+    args = options(pdf='none', **kwargs)
+    WordTea.processFile(in_file, tmp_file + '.pdf', tmp_file, args)
+    return tmp_file
+
+
+# Function that returns the texts of the paragraphs of every part of a .docx
+# file (document, headers and footers), the runs of a paragraph joined
+def partTexts(path):
+    rtn = dict()
+    with zipfile.ZipFile(path) as z:
+        for name in sorted(z.namelist()):
+            if name == 'word/document.xml' or name.startswith('word/header') or name.startswith('word/footer'):
+                root = etree.fromstring(z.read(name))
+                rtn[name] = [''.join(t.text or '' for t in p.iter(W + 't')) for p in root.iter(W + 'p')]
+    return rtn
@@ -0,0 +1,99 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+
+# Tests of the BibTeX support, the parser, the formatter, the numbering of the
+# citations and the reference list.
+
+import os
+import json
+import docx
+import bibtex
+from conftest import BIBTEX
+from wordTeaApi import process
+
+
+def testParser():
+    entries = bibtex.parseBibtex(BIBTEX)
+    assert sorted(entries) == ['k2', 'stathis2020', 'unused']
+    entry = entries['stathis2020']
+    assert entry['ID'] == 'Stathis2020'
+    assert entry['ENTRYTYPE'] == 'article'
+    # @string macros, # concatenation and the month macros are expanded
+    assert entry['journal'] == 'IEEE Trans. on CAD'
+    assert entry['month'] == 'March'
+    assert entry['volume'] == '39'
+    assert entries['k2']['booktitle'] == 'Proc. {DATE}'
+
+
+def testParserSkipsBadEntries():
+    text = '@comment{x} @preamble{"y"} @book{a, title={T}} @book{a, title={U}} @article{b, title={broken} @misc{c, title="ok"}'
+    entries = bibtex.parseBibtex(text)
+    # The first definition of a key is kept, the broken entry is skipped
+    assert entries == {'a': {'title': 'T', 'ENTRYTYPE': 'book', 'ID': 'a'},
+                       'c': {'title': 'ok', 'ENTRYTYPE': 'misc', 'ID': 'c'}}
+
+
+def testFormatter():
+    entries = bibtex.parseBibtex(BIBTEX)
+    assert bibtex.formatEntry(entries['stathis2020']) == 'D. Stathis and H. P. Müller, "On SiLago — fabrics," IEEE Trans. on CAD, vol. 39, no. 4, pp. 100–110, March 2020.'
+    assert bibtex.formatEntry(entries['k2']) == 'A. B. C and D. E, "X," in Proc. DATE, 2019.'
+
+
+def testNumberedByFirstCitation(bibFile):
+    document = docx.Document()
+    document.add_paragraph('As shown in [`cite{k2}`] and [`cite{Stathis2020}`], again [`cite{k2}`], missing [`cite{nokey}`].')
+    document.add_paragraph('^bibliography^')
+    [document, result] = process(document, bib=bibFile)
+    texts = [pr.text for pr in document.paragraphs]
+    assert texts[0] == 'As shown in [1] and [2], again [1], missing [`cite{nokey}`].'
+    # One paragraph per cited entry, the uncited entry is left out
+    assert texts[1:] == ['[1] A. B. C and D. E, "X," in Proc. DATE, 2019.',
+                         '[2] D. Stathis and H. P. Müller, "On SiLago — fabrics," IEEE Trans. on CAD, vol. 39, no. 4, pp. 100–110, March 2020.']
+    assert result.labels['cite'] == {'k2': '1', 'stathis2020': '2'}
+    assert [tags for tags, text in result.unresolved] == [['`cite{nokey}`']]
+
+
+def testCache(bibFile):
+    first = bibtex.bibliography(bibFile)
+    with open(bibFile + '.wtbib', encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['hash'] == first.hash
+    # The entries are read back from the cache
+    data['entries']['k2']['title'] = 'From the cache'
+    with open(bibFile + '.wtbib', 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    assert bibtex.bibliography(bibFile).get('k2')['title'] == 'From the cache'
+    # A cache of another content of the .bib file is not used
+    with open(bibFile, 'a', encoding='utf-8') as f:
+        f.write('\n@misc{new, title={new}}\n')
+    second = bibtex.bibliography(bibFile)
+    assert 'new' in second
+    assert second.get('k2')['title'] == 'X'
+    # Without save an existing cache is read but never written
+    os.remove(bibFile + '.wtbib')
+    bibtex.bibliography(bibFile, save=False)
+    assert not os.path.exists(bibFile + '.wtbib')
@@ -0,0 +1,82 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+
+# Tests of the check mode (--check), the JSON report on stdout, the exit code
+# and that no file is written.
+
+import os
+import sys
+import json
+import subprocess
+from docx import Document
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'WordTea.py')
+
+
+# Function that runs the check mode in a new interpreter, as CI runs it, and
+# returns the exit code, the report and the messages
+def check(path, *options):
+    rtn = subprocess.run([sys.executable, SCRIPT, path, '--check'] + list(options), capture_output=True, text=True)
+    return [rtn.returncode, json.loads(rtn.stdout), rtn.stderr]
+
+
+def writeDocument(path, paragraphs):
+    document = Document()
+    for text in paragraphs:
+        document.add_paragraph(text)
+    document.save(path)
+    return path
+
+
+def testReportOfTheErrors(tmp_path):
+    path = writeDocument(str(tmp_path / 'errors.docx'), ['Figure ^fig{a}^', 'Again ^fig{a}^', 'See `fig{a}` and `fig{b}`', 'Table ^tbl{t}^'])
+    [code, report, messages] = check(path)
+    assert code == 1
+    assert report['errors'] == 2
+    assert report['warnings'] == 1
+    assert report['labels']['fig'] == 1
+    found = sorted((d['severity'], d['code'], d['kind'], d['label']) for d in report['diagnostics'])
+    assert found == [('error', 'duplicate', 'fig', 'a'), ('error', 'undeclared', 'fig', 'b'), ('warning', 'unused', 'tbl', 't')]
+    assert 'Execution successfully completed!' not in messages
+
+
+def testCleanDocument(tmp_path):
+    path = writeDocument(str(tmp_path / 'clean.docx'), ['Figure ^fig{a}^', 'See `fig{a}`'])
+    [code, report, messages] = check(path)
+    assert code == 0
+    assert report['errors'] == 0
+    assert report['diagnostics'] == []
+
+
+def testNoFileIsWritten(tmp_path, bibFile):
+    path = writeDocument(str(tmp_path / 'cite.docx'), ['As shown in `cite{k2}` and `cite{nokey}`'])
+    before = sorted(os.listdir(str(tmp_path)))
+    [code, report, messages] = check(path, '-r', bibFile)
+    assert code == 1
+    assert [(d['code'], d['label']) for d in report['diagnostics']] == [('undeclared', 'nokey')]
+    # Not even the cache of the bibliography
+    assert sorted(os.listdir(str(tmp_path))) == before
@@ -0,0 +1,60 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+
+# Tests of the docx and the stream engines, both must give the same document,
+# with the labels removed and the tags replaced in every part of it.
+
+from conftest import process, partTexts
+
+
+def testEnginesGiveTheSameDocument(storyDocument, tmp_path):
+    docx = partTexts(process(storyDocument, str(tmp_path / 'docx.docx'), engine='docx'))
+    stream = partTexts(process(storyDocument, str(tmp_path / 'stream.docx'), engine='stream'))
+    assert docx == stream
+
+
+def testLabelsAndTagsOfAllTheParts(storyDocument, tmp_path):
+    parts = partTexts(process(storyDocument, str(tmp_path / 'out.docx')))
+    body = parts['word/document.xml']
+    # Numbered in the order of the document: f1, f4 (split in many runs), f2, f3
+    assert 'Body  see 3 and 1' in body
+    assert 'Split  and 1 end' in body
+    assert 'Cell ' in body
+    assert 'Nested  1' in body
+    # Unknown tags are kept in the text
+    assert 'End 4 2 `sec1{none}`' in body
+    assert [text for part, texts in parts.items() if part.startswith('word/header') for text in texts] == ['Header 3 ']
+    assert [text for part, texts in parts.items() if part.startswith('word/footer') for text in texts] == ['Footer 1']
+
+
+def testTextBoxCopies(storyDocument, tmp_path):
+    for engine in ['docx', 'stream']:
+        body = partTexts(process(storyDocument, str(tmp_path / (engine + '.docx')), engine=engine))['word/document.xml']
+        # The mc:Choice and the mc:Fallback copies of the text box are both
+        # replaced, the label is only declared once
+        assert body.count('Box  4') == 2
+        assert not any('^' in text or '`fig' in text for text in body)
@@ -0,0 +1,125 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+
+# Tests of the label cache (--cache), a run that restores the lists from the
+# cache must give the same document as a run without it.
+
+import json
+import stats
+from docx import Document
+from lxml import etree
+from conftest import process, partTexts
+
+
+# Function that processes a document with the cache and returns the texts and
+# the counters of the cache
+def cachedRun(in_file, out_file, cache, engine='docx'):
+    collector = stats.start()
+    try:
+        texts = partTexts(process(in_file, out_file, engine=engine, cache=cache))
+    finally:
+        stats.stop()
+    return [texts, collector.counters]
+
+
+# Declares a new figure before all the others and adds a tag of it at the end
+def editDocument(path):
+    document = Document(path)
+    document.paragraphs[0].insert_paragraph_before('New ^fig{f0}^')
+    document.add_paragraph('Last `fig{f0}` `fig{f3}`')
+    document.save(path)
+
+
+def testCacheGivesTheSameDocument(storyDocument, tmp_path):
+    cache = str(tmp_path / 'story.wtcache')
+    full = partTexts(process(storyDocument, str(tmp_path / 'full.docx')))
+    [first, counters] = cachedRun(storyDocument, str(tmp_path / 'first.docx'), cache)
+    assert first == full
+    assert counters['cache_scanned'] > 0
+    [second, counters] = cachedRun(storyDocument, str(tmp_path / 'second.docx'), cache)
+    assert second == full
+    assert counters['cache_scanned'] == 0
+    # The cache file is data only
+    with open(cache, encoding='utf-8') as f:
+        assert isinstance(json.load(f), dict)
+
+
+def testCacheAfterAnEdit(storyDocument, tmp_path):
+    for engine in ['docx', 'stream']:
+        cache = str(tmp_path / (engine + '.wtcache'))
+        cachedRun(storyDocument, str(tmp_path / 'first.docx'), cache, engine)
+        edited = str(tmp_path / (engine + '.docx'))
+        with open(storyDocument, 'rb') as src, open(edited, 'wb') as dst:
+            dst.write(src.read())
+        editDocument(edited)
+        full = partTexts(process(edited, str(tmp_path / 'full.docx'), engine=engine))
+        [texts, counters] = cachedRun(edited, str(tmp_path / 'cached.docx'), cache, engine)
+        assert texts == full
+        assert 'New ' in texts['word/document.xml']
+        assert 'Last 1 5' in texts['word/document.xml']
+        # Only the new paragraphs are scanned
+        assert counters['cache_scanned'] == 2
+        assert counters['cache_reused'] > 0
+
+
+# A paragraph with a label in a hyperlink, and tabs and breaks in the runs of
+# its labels and tags
+def hyperlinkDocument(path):
+    document = Document()
+    holder = document.add_paragraph('Link ')
+    holder._p.append(etree.fromstring('<w:hyperlink xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                                      '<w:r><w:t>^fig{x}^ `fig{y}`</w:t></w:r></w:hyperlink>'))
+    holder.add_run(' after ^fig{y}^')
+    tabs = document.add_paragraph('Tab')
+    tabs.add_run('\t^fig{z}^\tand ').add_break()
+    tabs.add_run('`fig{z}` `fig{y}`')
+    document.save(path)
+    return path
+
+
+def testRunsLikeTheDocxEngine(tmp_path):
+    path = hyperlinkDocument(str(tmp_path / 'links.docx'))
+    cache = str(tmp_path / 'links.wtcache')
+    full = partTexts(process(path, str(tmp_path / 'full.docx')))
+    for name in ['first.docx', 'second.docx']:
+        [texts, counters] = cachedRun(path, str(tmp_path / name), cache)
+        assert texts == full
+
+def testBrokenCacheIsRebuilt(storyDocument, tmp_path):
+    cache = str(tmp_path / 'story.wtcache')
+    full = partTexts(process(storyDocument, str(tmp_path / 'full.docx')))
+    cachedRun(storyDocument, str(tmp_path / 'out.docx'), cache)
+    with open(cache, encoding='utf-8') as f:
+        data = json.load(f)
+    # Right signature, wrong content
+    data['states'] = 5
+    for content in [b'\x80\x04 not json', b'{"signature": [], "paragraphs": 1}', json.dumps(data).encode('utf-8')]:
+        with open(cache, 'wb') as f:
+            f.write(content)
+        [texts, counters] = cachedRun(storyDocument, str(tmp_path / 'out.docx'), cache)
+        assert texts == full
+        assert counters['cache_scanned'] > 0
@@ -0,0 +1,52 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+
+# Tests of the pipeline of the batch mode (--pipeline), a failed document does
+# not stop the others and no temporary file is left behind.
+
+import os
+import tempfile
+from pipeline import documentPipeline, pipelineJob
+from wordTeaApi import options
+
+
+def testTemporaryFilesAreRemoved(storyDocument, tmp_path, monkeypatch):
+    temp = tmp_path / 'temp'
+    temp.mkdir()
+    monkeypatch.setattr(tempfile, 'tempdir', str(temp))
+    bad = str(tmp_path / 'bad.docx')
+    with open(bad, 'w') as f:
+        f.write('not a document')
+    # Nothing is created before a stage needs it
+    pipelineJob(storyDocument, str(tmp_path / 'story.pdf'), None)
+    assert os.listdir(str(temp)) == []
+    jobs = [(bad, str(tmp_path / 'bad.pdf'), None), (storyDocument, str(tmp_path / 'story.pdf'), None)]
+    for engine in ['docx', 'stream']:
+        items = documentPipeline(options(pdf='none', engine=engine)).run(jobs)
+        assert [item.status for item in items] == ['failed', 'ok']
+        assert 'BadZipFile' in items[0].message
+        assert os.listdir(str(temp)) == []
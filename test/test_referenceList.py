@@ -0,0 +1,82 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+
+# Tests of the referenceList, the look up of the labels, the number table and
+# the number formats.
+
+import pytest
+from referenceList import referenceList
+from UtilFunctions import int_to_small, int_to_cap, int_to_roman
+
+
+def testGetEntryMatchesWholeLabels():
+    fig = referenceList("Figures", "fig", "fig", 1, None)
+    for label in ['fig10', 'fig1', 'Fig100']:
+        fig.addLabel(label, False, False)
+    assert fig.getEntry('fig1')[:2] == [1, 2]
+    assert fig.getEntry('fig10')[:2] == [0, 1]
+    # Case and the spaces around the label are ignored
+    assert fig.getEntry(' FIG100 ')[:2] == [2, 3]
+    assert fig.getEntry('fig') is None
+    assert fig.getEntry('fig1000') is None
+
+
+def testResolveMatchesWholeLabels():
+    fig = referenceList("Figures", "fig", "fig", 1, None)
+    for label in ['fig10', 'fig1']:
+        fig.addLabel(label, False, False)
+    fig.buildTable(False)
+    assert fig.resolve('fig1') == '2'
+    assert fig.resolve('fig10') == '1'
+    assert fig.resolve('fig2') is None
+
+
+def testFormatsPastTheLastLetter():
+    assert [int_to_small(i) for i in [1, 26, 27, 52, 53, 702, 703]] == ['a', 'z', 'aa', 'az', 'ba', 'zz', 'aaa']
+    assert [int_to_cap(i) for i in [26, 27, 28]] == ['Z', 'AA', 'AB']
+
+
+def testRomanPast3999():
+    assert [int_to_roman(i) for i in [1, 4, 9, 14, 40, 3999]] == ['I', 'IV', 'IX', 'XIV', 'XL', 'MMMCMXCIX']
+    assert [int_to_roman(i) for i in [4000, 4001, 5000]] == ['MMMM', 'MMMMI', 'MMMMM']
+    with pytest.raises(ValueError):
+        int_to_roman(0)
+
+
+def testNumberTableOfTheSections():
+    sec1 = referenceList("Heading 1", "sec1", "sec1", 2)
+    sec2 = referenceList("Heading 2", "sec2", "sec2", 3, sec1)
+    sec3 = referenceList("Heading 3", "sec3", "sec3", 1, sec2)
+    # Declared before any section, no parent number
+    sec3.addLabel('intro', False, False)
+    for [lst, label] in [(sec1, 'a'), (sec2, 'a1'), (sec2, 'a2'), (sec3, 'a2x'), (sec1, 'b'), (sec2, 'b1'), (sec3, 'b1x'), (sec3, 'b1y')]:
+        lst.addLabel(label, False, False)
+    # The table of the parents is built first
+    sec3.buildTable(False)
+    assert sec1.numberTable == ('I', 'II')
+    assert sec2.numberTable == ('I.a', 'I.b', 'II.a')
+    assert sec3.numberTable == ('1', 'I.b.1', 'II.a.1', 'II.a.2')
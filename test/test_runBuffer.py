@@ -0,0 +1,89 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+
+# Tests of the runBuffer, the offsets of the joined text of the runs and the
+# runs changed by apply.
+
+from UtilFunctions import runBuffer
+
+
+class textRun:
+    def __init__(self, text):
+        self.text = text
+
+
+def texts(runs):
+    return [run.text for run in runs]
+
+
+def testJoinedTextAndOffsets():
+    buf = runBuffer([textRun('ab'), textRun(None), textRun('cde'), textRun('')])
+    assert buf.text == 'abcde'
+    assert buf.starts == [0, 2, 2, 5]
+    assert buf.ends == [2, 2, 5, 5]
+
+
+def testReplaceInsideOneRun():
+    runs = [textRun('see '), textRun('`fig{a}`'), textRun(' end')]
+    buf = runBuffer(runs)
+    buf.replace(4, 12, '1')
+    assert buf.apply() == [runs[1]]
+    assert texts(runs) == ['see ', '1', ' end']
+    assert buf.text == 'see 1 end'
+
+
+def testReplaceAcrossRuns():
+    runs = [textRun('Fig ^fi'), textRun('g{'), textRun('a}^ and `fig'), textRun('{a}` end')]
+    buf = runBuffer(runs)
+    start = buf.text.index('^')
+    end = buf.text.index('^', start + 1) + 1
+    buf.replace(start, end, '')
+    tag = buf.text.index('`')
+    buf.replace(tag, buf.text.index('`', tag + 1) + 1, '1')
+    # The new text goes to the first run of a match, the other runs lose theirs
+    assert buf.apply() == runs
+    assert texts(runs) == ['Fig ', '', ' and 1', ' end']
+    assert buf.text == 'Fig  and 1 end'
+
+
+def testUntouchedRunsAreNotWritten():
+    runs = [textRun('a'), textRun('b'), textRun('c')]
+    buf = runBuffer(runs)
+    assert buf.apply() == []
+    buf.replace(1, 1, 'x')
+    assert buf.apply() == []
+    assert texts(runs) == ['a', 'b', 'c']
+
+
+def testReplacementsInAnyOrder():
+    runs = [textRun('0123'), textRun('4567')]
+    buf = runBuffer(runs)
+    buf.replace(6, 8, 'Z')
+    buf.replace(0, 2, 'X')
+    buf.replace(3, 5, 'Y')
+    buf.apply()
+    assert texts(runs) == ['X2Y', '5Z']
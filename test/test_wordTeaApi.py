@@ -0,0 +1,60 @@
+#! python3
+
+# Copyright 2017, Dimitrios Stathis, All rights reserved.
+# email         : stathis@kth.se, sta.dimitris@gmail.com
+# Version       : 0.2.0
+# Last edited   : 18/10/2026
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+#                                                                         #
+#This file is part of WordTea.                                            #
+#                                                                         #
+#    WordTea is free software: you can redistribute it and/or modify      #
+#    it under the terms of the GNU General Public License as published by #
+#    the Free Software Foundation, either version 3 of the License, or    #
+#    (at your option) any later version.                                  #
+#                                                                         #
+#    WordTea is distributed in the hope that it will be useful,           #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+#    GNU General Public License for more details.                         #
+#                                                                         #
+#    You should have received a copy of the GNU General Public License    #
+#    along with WordTea.  If not, see <https://www.gnu.org/licenses/>.    #
+#                                                                         #
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+
+
+# Tests of the library API, process on a path, bytes, a binary file object and
+# a Document, all must give the same result.
+
+import io
+import docx
+from wordTeaApi import process
+
+
+def texts(document):
+    return [pr.text for pr in document.paragraphs]
+
+
+def testAllTheSources(storyDocument):
+    [expected, result] = process(docx.Document(storyDocument))
+    with open(storyDocument, 'rb') as f:
+        data = f.read()
+    for source in [storyDocument, data, io.BytesIO(data)]:
+        [document, other] = process(source)
+        assert texts(document) == texts(expected)
+        assert other.labels == result.labels
+    assert result.labels['fig'] == {'f1': '1', 'f4': '2', 'f2': '3', 'f3': '4'}
+    assert result.labels['tbl'] == {'t1': '1'}
+    assert [tags for tags, text in result.unresolved] == [['`sec1{none}`']]
+    assert any('sec1{none}' in message for message in result.warnings)
+
+
+def testDocumentChangedInPlace(storyDocument):
+    document = docx.Document(storyDocument)
+    [rtn, result] = process(document, s1=2)
+    assert rtn is document
+    assert texts(document)[0] == 'Body  see 3 and 1'
+    assert set(result.timings) == {'open', 'build', 'replace'}
+